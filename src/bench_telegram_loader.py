@@ -0,0 +1,110 @@
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from termcolor import colored
+from utils import TelegramChatLoader, create_dir
+
+WORDS = (
+    "hola que tal alguien sabe como cargar el modelo con langchain y chroma "
+    "gracias por la respuesta revisa la documentacion del embedding"
+).split()
+
+
+def write_synthetic_export(
+    file_path: str, num_chats: int, messages_per_chat: int, seed: int = 0
+) -> None:
+    """
+    Escribe una exportación completa de Telegram Desktop sintética, mensaje a mensaje.
+
+    Args:
+        file_path (str): Ruta del archivo JSON a generar.
+        num_chats (int): Número de chats de la exportación.
+        messages_per_chat (int): Número de mensajes por chat.
+        seed (int): Semilla del generador aleatorio.
+    """
+    rng = random.Random(seed)
+    start = datetime.datetime(2023, 6, 1)
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write('{"about": "Synthetic export", "chats": {"about": "", "list": [')
+        for chat_index in range(num_chats):
+            if chat_index:
+                file.write(",")
+            file.write(
+                f'{{"name": "Grupo {chat_index}", "type": "public_supergroup", '
+                f'"id": {1000 + chat_index}, "messages": ['
+            )
+            date = start
+            for message_id in range(1, messages_per_chat + 1):
+                date += datetime.timedelta(seconds=rng.choice((5, 30, 120, 3600)))
+                message = {
+                    "id": message_id,
+                    "type": "message",
+                    "date": date.isoformat(),
+                    "date_unixtime": str(int(date.timestamp())),
+                    "from": f"Usuario {rng.randrange(50)}",
+                    "from_id": f"user{rng.randrange(50)}",
+                    "text": " ".join(rng.choice(WORDS) for _ in range(rng.randrange(3, 40))),
+                }
+                if message_id > 1 and rng.random() < 0.3:
+                    message["reply_to_message_id"] = rng.randrange(
+                        max(1, message_id - 20), message_id
+                    )
+                if message_id > 1:
+                    file.write(",")
+                file.write(json.dumps(message, ensure_ascii=False))
+            file.write("]}")
+        file.write("]}}")
+
+
+def main():
+    """
+    Mide tiempo y memoria pico de `TelegramChatLoader` sobre una exportación sintética.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--chats", type=int, default=4)
+    parser.add_argument("--messages-per-chat", type=int, default=250000)
+    parser.add_argument("--window", choices=("time", "reply"), default="time")
+    parser.add_argument("--file", default="data/telegram_synthetic_export.json")
+    args = parser.parse_args()
+
+    create_dir(os.path.dirname(args.file) or ".")
+    if not os.path.exists(args.file):
+        print(colored(f"Generando exportación sintética: {args.file}", "blue"))
+        write_synthetic_export(args.file, args.chats, args.messages_per_chat)
+    size_mb = os.path.getsize(args.file) / 2**20
+
+    loader = TelegramChatLoader(args.file, window=args.window)
+    started = time.perf_counter()
+    num_documents = 0
+    num_messages = 0
+    for document in loader.lazy_load():
+        num_documents += 1
+        num_messages += document.metadata["message_count"]
+    elapsed = time.perf_counter() - started
+
+    # La memoria se mide en una segunda pasada porque tracemalloc ralentiza la lectura.
+    tracemalloc.start()
+    for _ in loader.lazy_load():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(colored(f"Archivo: {size_mb:.1f} MB", "green"))
+    print(colored(f"Mensajes: {num_messages} en {num_documents} ventanas", "green"))
+    print(
+        colored(
+            f"Tiempo: {elapsed:.2f} s ({size_mb / elapsed:.1f} MB/s, "
+            f"{num_messages / elapsed:.0f} mensajes/s)",
+            "green",
+        )
+    )
+    print(colored(f"Memoria pico: {peak / 2**20:.1f} MB", "green"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import List
+
+import numpy as np
+from langchain.chains import LLMChain
+from langchain.embeddings import FakeEmbeddings
+from langchain.llms.fake import FakeListLLM
+from langchain.prompts import PromptTemplate
+from pipeline import get_index_version
+from semantic_cache import get_semantic_cache
+from termcolor import colored
+
+
+class TextSeededFakeEmbeddings(FakeEmbeddings):
+    """
+    `FakeEmbeddings` que devuelve siempre el mismo vector para el mismo texto.
+
+    `FakeEmbeddings` genera un vector aleatorio nuevo en cada llamada, con lo que
+    una consulta repetida nunca coincidiría consigo misma.
+    """
+
+    def _embed(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        return list(np.random.default_rng(seed).normal(size=self.size))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def write_checkpoint(data_dir: str, index_key: str) -> None:
+    """
+    Escribe un checkpoint del pipeline con la etapa 'index' completa y la clave indicada.
+
+    Args:
+        data_dir (str): Directorio de datos del pipeline.
+        index_key (str): Clave de la etapa 'index', que hace de versión del índice.
+    """
+    with open(os.path.join(data_dir, "checkpoint.json"), "w") as checkpoint_file:
+        json.dump({"index": {"key": index_key, "complete": True}}, checkpoint_file)
+
+
+def main():
+    """
+    Comprueba sin red los aciertos, fallos e invalidación de la caché semántica.
+
+    Usa una cadena con `FakeListLLM`, embeddings falsos deterministas, la
+    configuración de 'config.yaml' y la versión del índice leída del checkpoint del
+    pipeline, como en la aplicación.
+    """
+    llm = FakeListLLM(responses=["respuesta 1", "respuesta 2", "respuesta 3"])
+    chain = LLMChain(
+        llm=llm, prompt=PromptTemplate.from_template("Responde: {question}")
+    )
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        config = {"pipeline": {"data_dir": data_dir}}
+        write_checkpoint(data_dir, "indice-a")
+        cache = get_semantic_cache(
+            chain,
+            TextSeededFakeEmbeddings(size=64),
+            index_version=lambda: get_index_version(config),
+        )
+
+        first = cache("¿Cómo creo un índice con Chroma?")
+        assert first["text"] == "respuesta 1" and llm.i == 1
+
+        repeated = cache("¿Cómo creo un índice con Chroma?")
+        assert repeated["text"] == "respuesta 1" and llm.i == 1, "se esperaba un acierto"
+
+        other = cache("¿Qué modelo de embeddings se usa?")
+        assert other["text"] == "respuesta 2" and llm.i == 2, "se esperaba un fallo"
+
+        # Un índice reconstruido con otro contenido tiene otra clave y vacía la caché.
+        write_checkpoint(data_dir, "indice-b")
+        rebuilt = cache("¿Cómo creo un índice con Chroma?")
+        assert rebuilt["text"] == "respuesta 3" and llm.i == 3, "se esperaba invalidación"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 1), stats
+    print(colored(f"Caché semántica correcta: {stats}", "green"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+import hashlib
+import json
+import re
+from itertools import combinations
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain.schema import Document
+from termcolor import colored
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para compararlo: minúsculas y espacios colapsados.
+
+    Args:
+        text (str): Texto a normalizar.
+
+    Returns:
+        El texto normalizado.
+    """
+    return re.sub(r"\s+", " ", text.lower()).strip()
+
+
+def simhash(tokens: List[str], shingle_size: int = 3) -> int:
+    """
+    Calcula la huella SimHash de 64 bits de una lista de tokens usando shingles de palabras.
+
+    Textos casi iguales producen huellas que difieren en pocos bits.
+
+    Args:
+        tokens (List[str]): Palabras del texto normalizado.
+        shingle_size (int): Número de palabras por shingle.
+
+    Returns:
+        La huella SimHash como entero de 64 bits.
+    """
+    shingles = {
+        " ".join(tokens[i : i + shingle_size])
+        for i in range(max(1, len(tokens) - shingle_size + 1))
+    }
+    bits = [
+        format(
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+            ),
+            "064b",
+        )
+        for shingle in shingles
+    ]
+    # Cada columna de `zip(*bits)` es una posición de bit; se activa si la mayoría de shingles la activa.
+    threshold = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count("1") > threshold)
+    return fingerprint
+
+
+class ChunkDeduplicator:
+    """
+    Detecta fragmentos repetidos antes de calcular sus embeddings.
+
+    Los duplicados exactos se detectan por el hash del contenido, los que solo difieren
+    en mayúsculas o espacios por el hash del texto normalizado y los casi
+    duplicados por SimHash con índices por bandas: la huella de 64 bits se parte en
+    `bands` bandas y, si dos huellas están a distancia de Hamming `max_distance` o
+    menor, al menos una banda difiere en `max_distance // bands` bits o menos. Por
+    eso cada banda se busca junto con todas sus variantes a esa distancia, y la
+    búsqueda encuentra todos los pares dentro del umbral sea cual sea `bands`; más
+    bandas significan más variantes que probar pero grupos de candidatos mayores.
+
+    Con fragmentos de 150 palabras, los valores por defecto detectan como casi
+    duplicado el 98% de las ediciones de una palabra y el 90% de las de dos, y
+    marcan el 7% de los pares que comparten el 80% del texto y ningún par de
+    fragmentos distintos.
+
+    Args:
+        max_distance (int): Distancia de Hamming máxima entre huellas para considerar dos fragmentos casi duplicados.
+            Con un valor negativo solo se eliminan los duplicados exactos.
+        bands (int): Número de bandas LSH en que se divide la huella.
+        shingle_size (int): Número de palabras por shingle del SimHash.
+        min_tokens (int): Número mínimo de palabras para buscar casi duplicados; los fragmentos más cortos solo se comparan de forma exacta.
+    """
+
+    def __init__(
+        self,
+        max_distance: int = 8,
+        bands: int = 3,
+        shingle_size: int = 3,
+        min_tokens: int = 10,
+    ):
+        self.max_distance = max_distance
+        self.bands = bands
+        self.band_bits = 64 // bands
+        radius = max(0, max_distance) // bands
+        # Máscaras de todas las variantes de una banda a distancia `radius` o menor.
+        self._flips = [
+            sum(1 << bit for bit in bits)
+            for distance in range(radius + 1)
+            for bits in combinations(range(self.band_bits), distance)
+        ]
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+
+    def _band_keys(self, fingerprint: int) -> List[Tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            (band, (fingerprint >> (band * self.band_bits)) & mask)
+            for band in range(self.bands)
+        ]
+
+    def _candidates(
+        self, band_keys: List[Tuple[int, int]], buckets: Dict
+    ) -> Iterator[int]:
+        for band, value in band_keys:
+            for flip in self._flips:
+                yield from buckets.get((band, value ^ flip), [])
+
+    def find_duplicates(self, texts: Iterable[str]) -> Dict[int, Tuple[int, str]]:
+        """
+        Busca los fragmentos repetidos de una secuencia de textos.
+
+        Args:
+            texts (Iterable[str]): Textos de los fragmentos, en orden.
+
+        Returns:
+            Un diccionario que asocia la posición de cada duplicado con la posición del
+            fragmento que se conserva y el tipo de duplicado ("exact", "normalized" o "near").
+        """
+        exact_index: Dict[bytes, int] = {}
+        normalized_index: Dict[bytes, int] = {}
+        fingerprints: List[Tuple[int, int]] = []
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        duplicates: Dict[int, Tuple[int, str]] = {}
+
+        for position, text in enumerate(texts):
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            if digest in exact_index:
+                duplicates[position] = (exact_index[digest], "exact")
+                continue
+            exact_index[digest] = position
+
+            normalized = normalize_text(text)
+            digest = hashlib.sha256(normalized.encode("utf-8")).digest()
+            if digest in normalized_index:
+                duplicates[position] = (normalized_index[digest], "normalized")
+                continue
+            normalized_index[digest] = position
+
+            tokens = normalized.split(" ")
+            if self.max_distance < 0 or len(tokens) < self.min_tokens:
+                continue
+
+            fingerprint = simhash(tokens, self.shingle_size)
+            band_keys = self._band_keys(fingerprint)
+            survivor = next(
+                (
+                    candidate
+                    for candidate in self._candidates(band_keys, buckets)
+                    if bin(fingerprint ^ fingerprints[candidate][1]).count("1")
+                    <= self.max_distance
+                ),
+                None,
+            )
+            if survivor is not None:
+                duplicates[position] = (fingerprints[survivor][0], "near")
+                continue
+
+            for key in band_keys:
+                buckets.setdefault(key, []).append(len(fingerprints))
+            fingerprints.append((position, fingerprint))
+
+        return duplicates
+
+
+def collect_aliases(
+    metadatas: Iterable[Dict], duplicates: Dict[int, Tuple[int, str]]
+) -> Dict[int, List[Dict]]:
+    """
+    Agrupa los metadatos de cada duplicado bajo la posición del fragmento que se conserva.
+
+    Args:
+        metadatas (Iterable[Dict]): Metadatos de todos los fragmentos, en orden.
+        duplicates (Dict[int, Tuple[int, str]]): Resultado de `ChunkDeduplicator.find_duplicates`.
+
+    Returns:
+        Un diccionario que asocia cada fragmento conservado con los metadatos de sus duplicados.
+    """
+    aliases: Dict[int, List[Dict]] = {}
+    for position, metadata in enumerate(metadatas):
+        if position in duplicates:
+            aliases.setdefault(duplicates[position][0], []).append(metadata)
+    return aliases
+
+
+def with_aliases(metadata: Dict, aliases: Optional[List[Dict]]) -> Dict:
+    """
+    Añade a los metadatos de un fragmento conservado los metadatos de sus duplicados.
+
+    Los alias se guardan como JSON en `metadata["aliases"]` porque Chroma solo admite
+    metadatos escalares; `metadata["alias_count"]` indica cuántos hay.
+
+    Args:
+        metadata (Dict): Metadatos del fragmento conservado.
+        aliases (Optional[List[Dict]]): Metadatos de sus duplicados, o None si no tiene.
+
+    Returns:
+        Los metadatos del fragmento, con los alias si los hay.
+    """
+    if not aliases:
+        return metadata
+    metadata = dict(metadata)
+    metadata["aliases"] = json.dumps(aliases)
+    metadata["alias_count"] = len(aliases)
+    return metadata
+
+
+def dedup_report(
+    lengths: List[int],
+    duplicates: Dict[int, Tuple[int, str]],
+    embedding_dimension: int = 768,
+) -> Dict:
+    """
+    Resume cuánto trabajo de embedding y cuánto índice se ahorra al eliminar los duplicados.
+
+    Args:
+        lengths (List[int]): Longitud en caracteres de todos los fragmentos, incluidos los duplicados.
+        duplicates (Dict[int, Tuple[int, str]]): Resultado de `ChunkDeduplicator.find_duplicates`.
+        embedding_dimension (int): Dimensión de los embeddings, para estimar el tamaño ahorrado del índice.
+
+    Returns:
+        Un diccionario con los contadores del ahorro.
+    """
+    kinds = [kind for _, kind in duplicates.values()]
+    characters_saved = sum(lengths[position] for position in duplicates)
+    return {
+        "chunks_in": len(lengths),
+        "chunks_out": len(lengths) - len(duplicates),
+        "exact_duplicates": kinds.count("exact"),
+        "normalized_duplicates": kinds.count("normalized"),
+        "near_duplicates": kinds.count("near"),
+        "embeddings_saved": len(duplicates),
+        "characters_saved": characters_saved,
+        "characters_saved_ratio": characters_saved / max(1, sum(lengths)),
+        # Vectores float32 más el texto del fragmento guardado junto a cada vector.
+        "index_bytes_saved": len(duplicates) * embedding_dimension * 4 + characters_saved,
+    }
+
+
+def print_dedup_report(report: Dict) -> None:
+    """
+    Muestra en consola el resumen de `dedup_report`.
+
+    Args:
+        report (Dict): Resumen del ahorro por deduplicación.
+    """
+    print(
+        colored(
+            f"Deduplicación: {report['chunks_in']} fragmentos -> {report['chunks_out']} "
+            f"({report['exact_duplicates']} exactos, {report['normalized_duplicates']} normalizados, "
+            f"{report['near_duplicates']} casi duplicados).",
+            "green",
+        )
+    )
+    print(
+        colored(
+            f"Embeddings evitados: {report['embeddings_saved']} "
+            f"({report['characters_saved']} caracteres, {report['characters_saved_ratio']:.1%} del texto). "
+            f"Índice: {report['index_bytes_saved'] / 2**20:.1f} MB menos.",
+            "green",
+        )
+    )
+
+
+def deduplicate_records(
+    records: Callable[[], Iterable[Dict]],
+    deduplicator: Optional[ChunkDeduplicator] = None,
+    embedding_dimension: int = 768,
+) -> Tuple[Iterator[Dict], Dict]:
+    """
+    Elimina los fragmentos duplicados de un flujo de registros sin cargarlos en memoria.
+
+    Los registros se recorren varias veces (huellas, alias, resumen y salida), así que
+    se reciben como una función que devuelve un iterador nuevo en cada llamada.
+
+    Args:
+        records (Callable[[], Iterable[Dict]]): Función que devuelve los registros con las claves
+            `page_content` y `metadata`, por ejemplo `lambda: read_jsonl(ruta)`.
+        deduplicator (Optional[ChunkDeduplicator]): Detector de duplicados. Si es None se usa uno con los valores por defecto.
+        embedding_dimension (int): Dimensión de los embeddings, para el resumen.
+
+    Returns:
+        Un iterador con los registros que se conservan, con sus alias en los metadatos, y el resumen del ahorro.
+    """
+    deduplicator = deduplicator or ChunkDeduplicator()
+    duplicates = deduplicator.find_duplicates(
+        record["page_content"] for record in records()
+    )
+    aliases = collect_aliases((record["metadata"] for record in records()), duplicates)
+    report = dedup_report(
+        [len(record["page_content"]) for record in records()],
+        duplicates,
+        embedding_dimension,
+    )
+    print_dedup_report(report)
+    survivors = (
+        dict(record, metadata=with_aliases(record["metadata"], aliases.get(position)))
+        for position, record in enumerate(records())
+        if position not in duplicates
+    )
+    return survivors, report
+
+
+def deduplicate_documents(
+    documents: List[Document],
+    deduplicator: Optional[ChunkDeduplicator] = None,
+    embedding_dimension: int = 768,
+) -> Tuple[List[Document], Dict]:
+    """
+    Elimina los fragmentos duplicados de una lista de documentos antes de calcular sus embeddings.
+
+    Args:
+        documents (List[Document]): Fragmentos producidos por el separador de texto.
+        deduplicator (Optional[ChunkDeduplicator]): Detector de duplicados. Si es None se usa uno con los valores por defecto.
+        embedding_dimension (int): Dimensión de los embeddings, para el resumen.
+
+    Returns:
+        Los documentos que se conservan, con sus alias en los metadatos, y el resumen del ahorro.
+    """
+    survivors, report = deduplicate_records(
+        lambda: (
+            {"page_content": document.page_content, "metadata": document.metadata}
+            for document in documents
+        ),
+        deduplicator,
+        embedding_dimension,
+    )
+    return [Document(**record) for record in survivors], report
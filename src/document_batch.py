@@ -0,0 +1,190 @@
+from array import array
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional
+
+from langchain.schema import Document
+
+MISSING = -1
+
+
+class DocumentBatch:
+    """
+    Lote columnar de documentos para mantener un corpus completo en memoria.
+
+    Los textos se guardan codificados en UTF-8 y concatenados en un único `bytearray`
+    con un arreglo de offsets en bytes, de modo que añadir es O(1) amortizado y un
+    carácter no latino no ensancha el resto del buffer. Cada clave de metadatos es una
+    columna categórica: un arreglo de códigos enteros y una lista con los valores
+    distintos. Así, los millones de fragmentos de un mismo
+    repositorio comparten una sola copia de `repo_owner`/`repo_name` en lugar de un
+    diccionario por fragmento. Los objetos `Document` solo se crean al entregarlos a
+    LangChain. Las etapas de `pipeline.py` no lo usan porque procesan los artefactos
+    registro a registro sin acumularlos.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offsets = array("q", [0])
+        self._codes: Dict[str, array] = {}
+        self._categories: Dict[str, List[Hashable]] = {}
+        self._lookup: Dict[str, Dict[Hashable, int]] = {}
+        self.source_rows: Optional[array] = None
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Document]) -> "DocumentBatch":
+        """
+        Construye un lote a partir de objetos Document.
+
+        Args:
+            documents (Iterable[Document]): Documentos a guardar.
+
+        Returns:
+            El lote con los textos y metadatos de los documentos.
+        """
+        batch = cls()
+        for document in documents:
+            batch.append(document.page_content, document.metadata)
+        return batch
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "DocumentBatch":
+        """
+        Construye un lote a partir de registros con las claves `page_content` y `metadata`.
+
+        Args:
+            records (Iterable[Dict]): Registros a guardar, por ejemplo las líneas de un artefacto JSONL.
+
+        Returns:
+            El lote con los textos y metadatos de los registros.
+        """
+        batch = cls()
+        for record in records:
+            batch.append(record["page_content"], record["metadata"])
+        return batch
+
+    def _empty_like(self) -> "DocumentBatch":
+        # El lote nuevo comparte las categorías para poder copiar los códigos sin traducirlos.
+        batch = DocumentBatch()
+        batch._categories = self._categories
+        batch._lookup = self._lookup
+        batch._codes = {key: array("i") for key in self._codes}
+        return batch
+
+    def _encode(self, key: str, value: Hashable) -> int:
+        lookup = self._lookup.setdefault(key, {})
+        code = lookup.get(value)
+        if code is None:
+            code = len(lookup)
+            lookup[value] = code
+            self._categories.setdefault(key, []).append(value)
+        return code
+
+    def _column(self, key: str) -> array:
+        column = self._codes.get(key)
+        if column is None:
+            column = self._codes[key] = array("i", [MISSING]) * len(self)
+        return column
+
+    def append(self, text: str, metadata: Dict) -> None:
+        """
+        Añade un documento al lote.
+
+        Args:
+            text (str): Texto del documento.
+            metadata (Dict): Metadatos del documento; los valores deben ser hashables.
+        """
+        for key, value in metadata.items():
+            self._column(key).append(self._encode(key, value))
+        for key, column in self._codes.items():
+            if key not in metadata:
+                column.append(MISSING)
+        self._push(text.encode("utf-8"))
+
+    def _push(self, encoded: bytes) -> None:
+        self._buffer += encoded
+        self._offsets.append(len(self._buffer))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def text(self, index: int) -> str:
+        """
+        Devuelve el texto del documento en la posición `index`.
+        """
+        return self._buffer[self._offsets[index] : self._offsets[index + 1]].decode(
+            "utf-8"
+        )
+
+    def metadata(self, index: int) -> Dict:
+        """
+        Devuelve un diccionario nuevo con los metadatos del documento en la posición `index`.
+        """
+        return {
+            key: self._categories[key][column[index]]
+            for key, column in self._codes.items()
+            if column[index] != MISSING
+        }
+
+    def texts(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.text(index)
+
+    def metadatas(self) -> Iterator[Dict]:
+        for index in range(len(self)):
+            yield self.metadata(index)
+
+    def __getitem__(self, index: int) -> Document:
+        return Document(page_content=self.text(index), metadata=self.metadata(index))
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_documents(self) -> List[Document]:
+        """
+        Crea los objetos Document del lote para entregarlos a LangChain.
+
+        Returns:
+            Una lista de objetos Document.
+        """
+        return list(self)
+
+    def take(self, indices: Iterable[int]) -> "DocumentBatch":
+        """
+        Crea un lote con los documentos de las posiciones indicadas, sin decodificar sus metadatos.
+
+        Args:
+            indices (Iterable[int]): Posiciones de los documentos a copiar, en el orden deseado.
+
+        Returns:
+            El lote con los documentos seleccionados.
+        """
+        batch = self._empty_like()
+        for index in indices:
+            for key, column in self._codes.items():
+                batch._codes[key].append(column[index])
+            batch._push(self._buffer[self._offsets[index] : self._offsets[index + 1]])
+        return batch
+
+    def split(self, text_splitter) -> "DocumentBatch":
+        """
+        Divide los documentos del lote en fragmentos con un separador de texto de LangChain.
+
+        Los fragmentos heredan los códigos de metadatos de su documento, sin crear
+        diccionarios intermedios. `source_rows` del lote resultante indica de qué
+        documento proviene cada fragmento.
+
+        Args:
+            text_splitter: Separador de texto de LangChain, por ejemplo `RecursiveCharacterTextSplitter`.
+
+        Returns:
+            El lote con los fragmentos.
+        """
+        chunks = self._empty_like()
+        chunks.source_rows = array("q")
+        for index in range(len(self)):
+            for chunk in text_splitter.split_text(self.text(index)):
+                for key, column in self._codes.items():
+                    chunks._codes[key].append(column[index])
+                chunks._push(chunk.encode("utf-8"))
+                chunks.source_rows.append(index)
+        return chunks
@@ -540,6 +540,14 @@ retriever_chroma = vectorstore_chroma.as_retriever(
 
 retriever_chroma.get_relevant_documents("What are the recent advances on public key cryptography?")
 
+"""El índice que construye `src/pipeline.py` puede guardar los embeddings con una dimensión reducida (`projection_enabled` en 'config.yaml'). Para consultarlo hay que abrirlo con `get_vectorstore`, que proyecta también las consultas a esa dimensión."""
+
+from utils import load_config
+from vectorstore import get_vectorstore
+
+vectorstore_pipeline = get_vectorstore(load_config(), embedding=embedding_instruct)
+vectorstore_pipeline.similarity_search("How do I create an index with Chroma?", k=2)
+
 """#### Creando una cadena para preguntar"""
 
 from langchain.chat_models import ChatOpenAI
@@ -566,6 +574,16 @@ query = "What is crypto?"
 respuesta = qa_chain_with_sources(query)
 respuesta
 
+"""Las preguntas repetidas o reformuladas no necesitan volver a pasar por el LLM. `get_semantic_cache` pone delante de la cadena una caché semántica configurada en la sección `semantic_cache` de 'config.yaml'; `build_cached_qa_chain` construye la misma cadena sobre el índice del pipeline, ya con la caché."""
+
+from semantic_cache import get_semantic_cache
+
+qa_chain_cached = get_semantic_cache(qa_chain_with_sources, embedding_instruct)
+
+qa_chain_cached("What is the relevance of public key crypto?")
+qa_chain_cached("What is the relevance of public-key cryptography?")
+qa_chain_cached.stats()
+
 """Todos estos son resultados buenos y relevantes. Pero, ¿qué podemos hacer con ellos? Existen diversas tareas que podemos realizar, pero una de las más interesantes (y muy bien soportada por LangChain) es la "Generación de Preguntas y Respuestas" o GQA.
 
 En la Generación de Preguntas y Respuestas (GQA), un modelo de lenguaje se utiliza para generar respuestas a preguntas basadas en un texto dado. Esto puede ser particularmente útil en una variedad de aplicaciones, desde chatbots inteligentes que pueden responder a preguntas basadas en manuales de usuario o documentación de productos, hasta motores de búsqueda más avanzados que pueden responder a preguntas en lugar de simplemente proporcionar una lista de documentos relevantes.
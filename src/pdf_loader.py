@@ -0,0 +1,180 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+
+from langchain.schema import Document
+from pypdf import PdfReader
+from termcolor import colored
+from utils import compute_file_hash, create_dir, load_config
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Extrae el texto de un rango de páginas de un PDF. Se ejecuta en los procesos del pool.
+
+    Args:
+        file_path (str): Ruta al archivo PDF.
+        start (int): Índice de la primera página (incluida).
+        end (int): Índice de la última página (excluida).
+
+    Returns:
+        Una lista con el texto de cada página del rango, en orden.
+    """
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() for i in range(start, end)]
+
+
+class ParallelPDFLoader:
+    """
+    Cargador de PDFs que extrae las páginas en un pool de procesos y las entrega en orden.
+
+    A diferencia de `PyPDFLoader(...).load()`, las páginas se emiten a medida que se
+    extraen, por lo que el separador de texto puede empezar a trabajar antes de que
+    termine el PDF. El texto extraído se guarda por hash de archivo, de modo que un
+    PDF que no ha cambiado nunca se vuelve a parsear.
+
+    Args:
+        file_paths (Union[str, List[str]]): Ruta o lista de rutas a los PDFs a cargar.
+        cache_dir (Optional[str]): Directorio de la caché de texto extraído. Si es None no se usa caché.
+        max_workers (int): Número de procesos del pool.
+        pages_per_task (int): Número de páginas que procesa cada tarea del pool.
+    """
+
+    def __init__(
+        self,
+        file_paths: Union[str, List[str]],
+        cache_dir: Optional[str] = "data/pdf_cache",
+        max_workers: int = 4,
+        pages_per_task: int = 8,
+    ):
+        self.file_paths = [file_paths] if isinstance(file_paths, str) else file_paths
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.pages_per_task = pages_per_task
+
+    def _cache_path(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}.jsonl")
+
+    def _read_cache(self, cache_path: str) -> Iterator[Tuple[int, str]]:
+        with open(cache_path) as cache_file:
+            for line in cache_file:
+                page = json.loads(line)
+                yield page["page"], page["text"]
+
+    def _extract_pages(
+        self, executor: ProcessPoolExecutor, file_path: str
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Reparte las páginas de un PDF en tareas y las devuelve en orden de página.
+
+        Se mantiene una ventana acotada de tareas en vuelo para no acumular en memoria
+        páginas que el consumidor todavía no ha pedido.
+        """
+        num_pages = len(PdfReader(file_path).pages)
+        ranges = [
+            (start, min(start + self.pages_per_task, num_pages))
+            for start in range(0, num_pages, self.pages_per_task)
+        ]
+        pending = deque()
+        next_range = 0
+        while next_range < len(ranges) or pending:
+            while next_range < len(ranges) and len(pending) < self.max_workers * 2:
+                start, end = ranges[next_range]
+                pending.append(
+                    (start, executor.submit(extract_page_range, file_path, start, end))
+                )
+                next_range += 1
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                yield start + offset, text
+
+    def _cached_pages(
+        self, executor: ProcessPoolExecutor, file_path: str
+    ) -> Iterator[Tuple[int, str]]:
+        """
+        Devuelve las páginas de un PDF desde la caché o, si no está, extrayéndolas y cacheándolas.
+        """
+        cache_path = self._cache_path(compute_file_hash(file_path))
+        if os.path.exists(cache_path):
+            print(colored(f"PDF en caché, se omite el parseo: {file_path}", "yellow"))
+            yield from self._read_cache(cache_path)
+            return
+
+        # Se escribe a un archivo temporal y se renombra al final para que un PDF
+        # interrumpido a medias nunca quede registrado como cacheado.
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w") as cache_file:
+            for page_number, text in self._extract_pages(executor, file_path):
+                cache_file.write(json.dumps({"page": page_number, "text": text}) + "\n")
+                yield page_number, text
+        os.replace(tmp_path, cache_path)
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Carga los PDFs como un flujo de documentos, uno por página y en orden de página.
+
+        Returns:
+            Un iterador de objetos Document con los metadatos `source` y `page`.
+        """
+        if self.cache_dir is not None:
+            create_dir(self.cache_dir)
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for file_path in self.file_paths:
+                print(colored(f"Procesando PDF: {file_path}", "blue"))
+                if self.cache_dir is None:
+                    pages = self._extract_pages(executor, file_path)
+                else:
+                    pages = self._cached_pages(executor, file_path)
+                for page_number, text in pages:
+                    yield Document(
+                        page_content=text,
+                        metadata={"source": file_path, "page": page_number},
+                    )
+
+    def load(self) -> List[Document]:
+        """
+        Carga todas las páginas de los PDFs.
+
+        Returns:
+            Una lista de objetos Document.
+        """
+        return list(self.lazy_load())
+
+
+def get_pdf_loader(file_paths: Union[str, List[str]]) -> ParallelPDFLoader:
+    """
+    Crea un `ParallelPDFLoader` con la configuración de la sección `pdf` de 'config.yaml'.
+
+    Args:
+        file_paths (Union[str, List[str]]): Ruta o lista de rutas a los PDFs a cargar.
+
+    Returns:
+        El cargador de PDFs configurado.
+    """
+    pdf_config = load_config().get("pdf", {})
+    return ParallelPDFLoader(
+        file_paths,
+        cache_dir=pdf_config.get("cache_path", "data/pdf_cache"),
+        max_workers=pdf_config.get("max_workers", 4),
+        pages_per_task=pdf_config.get("pages_per_task", 8),
+    )
+
+
+def split_documents_stream(
+    documents: Iterator[Document], text_splitter
+) -> Iterator[Document]:
+    """
+    Divide un flujo de documentos en fragmentos sin esperar a que termine la carga.
+
+    Args:
+        documents (Iterator[Document]): Documentos a dividir, por ejemplo `ParallelPDFLoader.lazy_load()`.
+        text_splitter: Separador de texto de LangChain, por ejemplo `RecursiveCharacterTextSplitter`.
+
+    Returns:
+        Un iterador de fragmentos que conservan los metadatos del documento original.
+    """
+    for document in documents:
+        yield from text_splitter.split_documents([document])
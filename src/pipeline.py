@@ -0,0 +1,673 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+from dedup import ChunkDeduplicator, deduplicate_records
+from langchain.embeddings import HuggingFaceInstructEmbeddings
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.vectorstores import Chroma
+from projection import PROJECTION_FILE_NAME, EmbeddingProjection, select_projection
+from streaming_pipeline import StreamingPipeline
+from termcolor import colored
+from text_extractor import (
+    CrawlPolicy,
+    build_record,
+    clean_text,
+    fetch_file_text,
+    get_github_headers,
+    iter_directory_files,
+)
+from utils import DocsJSONLLoader, compute_file_hash, create_dir, load_config
+from vectorstore import (
+    add_texts_to_vectorstore,
+    get_embeddings,
+    open_staging_collection,
+    promote_staging_collection,
+)
+
+STAGES = ["crawl", "clean", "load", "split", "dedup", "embed", "project", "index"]
+
+
+def read_jsonl(file_path: str) -> Iterator[Dict]:
+    """
+    Lee un archivo JSONL registro a registro.
+
+    Args:
+        file_path (str): Ruta del archivo JSONL.
+
+    Returns:
+        Un iterador con los registros del archivo.
+    """
+    with open(file_path) as jsonl_file:
+        for line in jsonl_file:
+            yield json.loads(line)
+
+
+def batched(records: Iterator, batch_size: int) -> Iterator[List]:
+    """
+    Agrupa un iterador en listas de tamaño `batch_size`.
+
+    Args:
+        records (Iterator): Elementos a agrupar.
+        batch_size (int): Tamaño de cada lote.
+
+    Returns:
+        Un iterador de listas; la última puede ser más corta.
+    """
+    records = iter(records)
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def reservoir_sample(records: Iterable, sample_size: int, seed: int = 0) -> List:
+    """
+    Elige una muestra uniforme de tamaño fijo de un iterador sin cargarlo entero en memoria.
+
+    Args:
+        records (Iterable): Elementos a muestrear.
+        sample_size (int): Tamaño de la muestra.
+        seed (int): Semilla del muestreo.
+
+    Returns:
+        Una lista con como mucho `sample_size` elementos.
+    """
+    rng = random.Random(seed)
+    sample = []
+    for position, record in enumerate(records):
+        if position < sample_size:
+            sample.append(record)
+        else:
+            replace = rng.randint(0, position)
+            if replace < sample_size:
+                sample[replace] = record
+    return sample
+
+
+def hash_inputs(*parts) -> str:
+    """
+    Calcula un hash estable de los parámetros y entradas de una etapa.
+
+    Returns:
+        El hash hexadecimal SHA-256 de las partes serializadas en JSON.
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def prepare_partial_artifact(artifact_path: str) -> int:
+    """
+    Prepara un artefacto JSONL a medio escribir para continuar escribiendo en él.
+
+    Si la ejecución anterior se interrumpió a mitad de una línea, esa línea se descarta.
+
+    Args:
+        artifact_path (str): Ruta del artefacto.
+
+    Returns:
+        El número de registros completos que ya contiene el artefacto.
+    """
+    if not os.path.exists(artifact_path):
+        return 0
+    block_size = 1 << 16
+    with open(artifact_path, "rb+") as artifact:
+        # Se busca el último salto de línea leyendo bloques desde el final del archivo.
+        end = artifact.seek(0, os.SEEK_END)
+        complete = 0
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            artifact.seek(start)
+            block = artifact.read(position - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                complete = start + newline + 1
+                break
+            position = start
+        if complete < end:
+            artifact.truncate(complete)
+
+        artifact.seek(0)
+        lines = 0
+        for block in iter(lambda: artifact.read(block_size), b""):
+            lines += block.count(b"\n")
+    return lines
+
+
+class JSONLWriter:
+    """
+    Escribe registros en un artefacto JSONL, uno por línea.
+
+    Args:
+        file (TextIO): Archivo abierto en modo append.
+    """
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def write(self, record: Dict) -> None:
+        self.file.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+class Pipeline:
+    """
+    Pipeline de ingesta reanudable: crawl, clean, load, split, dedup, embed, project e index.
+
+    Cada etapa escribe un artefacto JSONL cuyo nombre incluye el hash de sus entradas
+    (el hash del artefacto de la etapa anterior y sus parámetros) y registra su estado
+    en un archivo de checkpoint. Al volver a ejecutar, las etapas cuyas entradas no han
+    cambiado se omiten, y una etapa interrumpida continúa desde el último registro escrito.
+    Las entradas de 'crawl' incluyen el SHA de cada archivo del listado de GitHub, así
+    que un cambio en la documentación de origen vuelve a ejecutar el pipeline.
+    La etapa 'project' (reducción de dimensión de los embeddings) solo se ejecuta si
+    `projection_enabled` está activo en la configuración.
+
+    Args:
+        config (Dict): Configuración de la aplicación cargada de 'config.yaml'.
+        force (Optional[List[str]]): Etapas que se deben volver a ejecutar desde cero.
+    """
+
+    def __init__(self, config: Dict, force: Optional[List[str]] = None):
+        self.config = config
+        self.settings = config["pipeline"]
+        self.data_dir = self.settings["data_dir"]
+        self.force = set(force or [])
+        self.stages = [
+            stage
+            for stage in STAGES
+            if stage != "project" or self.settings.get("projection_enabled")
+        ]
+        self.checkpoint_path = os.path.join(self.data_dir, "checkpoint.json")
+        self._embedding = None
+        self.listing: List[Tuple[Dict, Dict]] = []
+        self.policy: Optional[CrawlPolicy] = None
+        create_dir(self.data_dir)
+        self.checkpoint = self._load_checkpoint()
+
+    def _load_checkpoint(self) -> Dict:
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as checkpoint_file:
+            return json.load(checkpoint_file)
+
+    def _save_checkpoint(self) -> None:
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as checkpoint_file:
+            json.dump(self.checkpoint, checkpoint_file, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @property
+    def embedding(self) -> HuggingFaceInstructEmbeddings:
+        if self._embedding is None:
+            self._embedding = get_embeddings(self.settings)
+        return self._embedding
+
+    def artifact(self, stage: str) -> str:
+        """
+        Devuelve la ruta del artefacto completo de una etapa ya ejecutada.
+        """
+        return self.checkpoint[stage]["artifact"]
+
+    def _stage_key(self, stage: str, params: Dict) -> Optional[str]:
+        index = self.stages.index(stage)
+        if not index:
+            return hash_inputs(stage, params, "")
+        previous = self.checkpoint.get(self.stages[index - 1], {})
+        if not previous.get("complete"):
+            return None
+        return hash_inputs(stage, params, previous["output_hash"])
+
+    def run_stage(
+        self,
+        stage: str,
+        params: Dict,
+        run: Callable[[JSONLWriter, int], None],
+    ) -> None:
+        """
+        Ejecuta una etapa, omitiéndola o reanudándola según su checkpoint.
+
+        Args:
+            stage (str): Nombre de la etapa.
+            params (Dict): Parámetros que, junto con la salida de la etapa anterior, definen sus entradas.
+            run (Callable[[JSONLWriter, int], None]): Función que escribe los registros de la etapa
+                omitiendo los primeros `done`, que ya están en el artefacto.
+        """
+        key = self._stage_key(stage, params)
+        artifact_path = os.path.join(self.data_dir, f"{stage}-{key[:16]}.jsonl")
+        state = self.checkpoint.get(stage, {})
+
+        if stage in self.force:
+            self.force.discard(stage)
+        elif (
+            state.get("key") == key
+            and state.get("complete")
+            and os.path.exists(artifact_path)
+        ):
+            print(colored(f"Etapa '{stage}' sin cambios, se omite.", "yellow"))
+            return
+        elif state.get("streaming_key") == key and state.get("complete"):
+            print(
+                colored(
+                    f"Etapa '{stage}' sin cambios desde la ejecución en streaming, se omite.",
+                    "yellow",
+                )
+            )
+            return
+        elif state.get("key") == key:
+            done = prepare_partial_artifact(artifact_path)
+            print(
+                colored(
+                    f"Reanudando etapa '{stage}' tras {done} registros ya escritos.",
+                    "yellow",
+                )
+            )
+            self._run(stage, key, artifact_path, run, done)
+            return
+
+        if os.path.exists(artifact_path):
+            os.remove(artifact_path)
+        print(colored(f"Ejecutando etapa '{stage}'.", "blue"))
+        self._run(stage, key, artifact_path, run, 0)
+
+    def _run(
+        self,
+        stage: str,
+        key: str,
+        artifact_path: str,
+        run: Callable[[JSONLWriter, int], None],
+        done: int,
+    ) -> None:
+        previous_artifact = self.checkpoint.get(stage, {}).get("artifact")
+        if previous_artifact not in (None, artifact_path) and os.path.exists(
+            previous_artifact
+        ):
+            os.remove(previous_artifact)
+
+        self.checkpoint[stage] = {
+            "key": key,
+            "artifact": artifact_path,
+            "complete": False,
+        }
+        self._save_checkpoint()
+
+        with open(artifact_path, "a") as artifact:
+            run(JSONLWriter(artifact), done)
+
+        self.checkpoint[stage]["complete"] = True
+        self.checkpoint[stage]["output_hash"] = compute_file_hash(artifact_path)
+        self._save_checkpoint()
+        print(colored(f"Etapa '{stage}' completada: {artifact_path}", "green"))
+
+    def _list_files(self) -> List[Tuple[Dict, Dict]]:
+        """
+        Lista los archivos a descargar de los repositorios configurados, aplicando `CrawlPolicy`.
+
+        Returns:
+            Una lista de pares (entrada del listado de la API de GitHub, repositorio).
+        """
+        headers = get_github_headers()
+        self.policy = CrawlPolicy.from_config(self.config["github"])
+        return [
+            (file, repo_info)
+            for repo_info in self.config["github"]["repos"]
+            for file in iter_directory_files(
+                repo_info["path"], repo_info, headers, self.policy
+            )
+        ]
+
+    def crawl(self, writer: JSONLWriter, done: int) -> None:
+        if done:
+            downloaded = {
+                record["url"] for record in islice(read_jsonl(writer.file.name), done)
+            }
+        else:
+            downloaded = set()
+        for file, repo_info in self.listing:
+            url = file["download_url"]
+            if url in downloaded:
+                continue
+            print(colored(f"Descargando documento: {file['name']}", "green"))
+            text = fetch_file_text(url)
+            if text is None or not isinstance(text, str):
+                print(f"Texto no esperado: {text}")
+                continue
+            record = build_record(file["name"], repo_info, text)
+            record["url"] = url
+            writer.write(record)
+        self.policy.print_report()
+
+    def clean(self, writer: JSONLWriter, done: int) -> None:
+        for record in islice(read_jsonl(self.artifact("crawl")), done, None):
+            repo_info = {"owner": record["repo_owner"], "repo": record["repo_name"]}
+            writer.write(build_record(record["title"], repo_info, clean_text(record["text"])))
+
+    def load(self, writer: JSONLWriter, done: int) -> None:
+        for record in islice(read_jsonl(self.artifact("clean")), done, None):
+            writer.write(
+                {
+                    "page_content": record.get("text", ""),
+                    "metadata": DocsJSONLLoader.record_metadata(record),
+                }
+            )
+
+    def split(self, writer: JSONLWriter, done: int) -> None:
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.settings["chunk_size"],
+            chunk_overlap=self.settings["chunk_overlap"],
+            length_function=len,
+        )
+        position = 0
+        for document_index, document in enumerate(read_jsonl(self.artifact("load"))):
+            chunks = text_splitter.split_text(document["page_content"])
+            for chunk_index, chunk in enumerate(chunks):
+                if position >= done:
+                    writer.write(
+                        {
+                            "id": f"{document_index}-{chunk_index}",
+                            "page_content": chunk,
+                            "metadata": document["metadata"],
+                        }
+                    )
+                position += 1
+
+    def dedup(self, writer: JSONLWriter, done: int) -> None:
+        split_artifact = self.artifact("split")
+        survivors, report = deduplicate_records(
+            lambda: read_jsonl(split_artifact),
+            ChunkDeduplicator(
+                max_distance=self.settings["dedup_max_distance"],
+                bands=self.settings["dedup_bands"],
+            ),
+            self.settings["embedding_dimension"],
+        )
+        for chunk in islice(survivors, done, None):
+            writer.write(chunk)
+        with open(os.path.join(self.data_dir, "dedup-report.json"), "w") as report_file:
+            json.dump(report, report_file, indent=2)
+
+    def embed(self, writer: JSONLWriter, done: int) -> None:
+        chunks = islice(read_jsonl(self.artifact("dedup")), done, None)
+        for batch in batched(chunks, self.settings["embedding_batch_size"]):
+            embeddings = self.embedding.embed_documents(
+                [chunk["page_content"] for chunk in batch]
+            )
+            for chunk, embedding in zip(batch, embeddings):
+                writer.write({"id": chunk["id"], "embedding": embedding})
+            # Cada lote se lleva a disco para no recalcularlo si la ejecución se interrumpe.
+            writer.flush()
+
+    def _projection_path(self) -> str:
+        return os.path.join(
+            self.data_dir, f"projection-{self.checkpoint['project']['key'][:16]}.npz"
+        )
+
+    def _sample_embeddings(self, sample_size: int) -> np.ndarray:
+        embeddings = (record["embedding"] for record in read_jsonl(self.artifact("embed")))
+        return np.asarray(reservoir_sample(embeddings, sample_size), dtype=np.float32)
+
+    def _projection_queries(self) -> np.ndarray:
+        questions = self.settings.get("projection_questions") or [
+            chunk["page_content"]
+            for chunk in reservoir_sample(
+                read_jsonl(self.artifact("dedup")),
+                self.settings["projection_queries"],
+                seed=1,
+            )
+        ]
+        # Instructor codifica las consultas con otra instrucción que los documentos.
+        return np.asarray(
+            [self.embedding.embed_query(question) for question in questions],
+            dtype=np.float32,
+        )
+
+    def project(self, writer: JSONLWriter, done: int) -> None:
+        projection_path = self._projection_path()
+        if done:
+            if not os.path.exists(projection_path):
+                return
+            projection = EmbeddingProjection.load(projection_path)
+        else:
+            projection, report = select_projection(
+                self._sample_embeddings(self.settings["projection_sample_size"]),
+                self._projection_queries(),
+                target_recall=self.settings["projection_target_recall"],
+                k=self.settings["projection_k"],
+                candidates=self.settings["projection_candidates"],
+                method=self.settings["projection_method"],
+            )
+            with open(
+                os.path.join(self.data_dir, "projection-report.json"), "w"
+            ) as report_file:
+                json.dump(report, report_file, indent=2)
+            if projection is None:
+                # Sin proyección, 'index' lee los vectores de 'embed' en lugar de una copia.
+                if os.path.exists(projection_path):
+                    os.remove(projection_path)
+                writer.write(
+                    {
+                        "projected": False,
+                        "embed_hash": self.checkpoint["embed"]["output_hash"],
+                    }
+                )
+                return
+            projection.save(projection_path)
+
+        records = islice(read_jsonl(self.artifact("embed")), done, None)
+        for batch in batched(records, 1024):
+            embeddings = [record["embedding"] for record in batch]
+            if projection is not None:
+                embeddings = projection.transform(embeddings).tolist()
+            for record, embedding in zip(batch, embeddings):
+                writer.write({"id": record["id"], "embedding": embedding})
+
+    def _fill_index(
+        self, vectorstore: Chroma, writer: JSONLWriter, done: int, vectors_stage: str
+    ) -> None:
+        batch_size = self.settings["index_batch_size"]
+        persist_every = self.settings["index_persist_every"]
+        rows = zip(
+            read_jsonl(self.artifact("dedup")), read_jsonl(self.artifact(vectors_stage))
+        )
+        pending = []
+        for batch_number, batch in enumerate(
+            batched(islice(rows, done * batch_size, None), batch_size), start=done
+        ):
+            chunks, embeddings = zip(*batch)
+            add_texts_to_vectorstore(
+                vectorstore,
+                [chunk["page_content"] for chunk in chunks],
+                [chunk["metadata"] for chunk in chunks],
+                ids=[chunk["id"] for chunk in chunks],
+                embeddings=[embedding["embedding"] for embedding in embeddings],
+            )
+            pending.append({"batch": batch_number, "count": len(chunks)})
+            # Un lote solo se registra como hecho cuando Chroma lo ha persistido en disco.
+            if len(pending) >= persist_every:
+                vectorstore.persist()
+                for record in pending:
+                    writer.write(record)
+                writer.flush()
+                pending = []
+        vectorstore.persist()
+        for record in pending:
+            writer.write(record)
+        writer.flush()
+
+    def index(self, writer: JSONLWriter, done: int) -> None:
+        # El índice se construye en una colección temporal y solo se publica al terminar;
+        # al reanudar se sigue escribiendo en ella.
+        staging = open_staging_collection(self.settings, "staging", resume=bool(done))
+        projected = "project" in self.stages and os.path.exists(
+            self._projection_path()
+        )
+        vectors_stage = "project" if projected else "embed"
+        if done and staging._collection.count() == 0:
+            print(
+                colored(
+                    "La colección temporal ya se publicó en la ejecución anterior.",
+                    "yellow",
+                )
+            )
+        else:
+            self._fill_index(staging, writer, done, vectors_stage)
+            promote_staging_collection(staging, self.settings)
+
+        # La proyección se guarda junto al índice para aplicarla también a las consultas.
+        index_projection = os.path.join(
+            self.settings["chroma_persist_directory"], PROJECTION_FILE_NAME
+        )
+        if projected:
+            shutil.copyfile(self._projection_path(), index_projection)
+        elif os.path.exists(index_projection):
+            os.remove(index_projection)
+
+    def record_streaming_index(self) -> None:
+        """
+        Registra en el checkpoint que el índice se ha reconstruido en modo streaming.
+
+        La etapa 'index' recibe una clave nueva, para que la versión del índice cambie
+        y la caché semántica se vacíe, y guarda en `streaming_key` la clave que tendría
+        con los artefactos actuales. La siguiente ejecución por etapas solo vuelve a
+        indexar si alguna etapa anterior cambia y, con ella, esa clave; así no sustituye
+        el índice de streaming por uno construido con artefactos más antiguos.
+        """
+        previous_artifact = self.checkpoint.get("index", {}).get("artifact")
+        if previous_artifact and os.path.exists(previous_artifact):
+            os.remove(previous_artifact)
+        self.checkpoint["index"] = {
+            "key": hash_inputs("streaming", self.settings, time.time()),
+            "streaming_key": self._stage_key("index", self._params()["index"]),
+            "complete": True,
+        }
+        self._save_checkpoint()
+
+    def _params(self) -> Dict:
+        # El SHA de cada archivo del listado hace que la clave de 'crawl' cambie con el contenido.
+        listing_hash = hash_inputs(
+            sorted(
+                (repo_info["owner"], repo_info["repo"], file["path"], file["sha"])
+                for file, repo_info in self.listing
+            )
+        )
+        return {
+            "crawl": {
+                "repos": self.config["github"]["repos"],
+                "filters": self.config["github"].get("filters", {}),
+                "byte_budget": self.config["github"].get("byte_budget"),
+                "listing": listing_hash,
+            },
+            "clean": {},
+            "load": {},
+            "split": {
+                "chunk_size": self.settings["chunk_size"],
+                "chunk_overlap": self.settings["chunk_overlap"],
+            },
+            "dedup": {
+                "dedup_max_distance": self.settings["dedup_max_distance"],
+                "dedup_bands": self.settings["dedup_bands"],
+            },
+            "embed": {"embedding_model": self.settings["embedding_model"]},
+            "project": {
+                key: value
+                for key, value in self.settings.items()
+                if key.startswith("projection_")
+            },
+            "index": {
+                "chroma_persist_directory": self.settings["chroma_persist_directory"],
+                "chroma_collection": self.settings["chroma_collection"],
+                "index_batch_size": self.settings["index_batch_size"],
+            },
+        }
+
+    def run(self, stop_after: Optional[str] = None) -> None:
+        """
+        Ejecuta las etapas del pipeline en orden.
+
+        Args:
+            stop_after (Optional[str]): Última etapa a ejecutar. Si es None se ejecutan todas.
+        """
+        self.listing = self._list_files()
+        if not self.listing:
+            print(
+                colored(
+                    "El listado de GitHub está vacío; no se ejecuta el pipeline.", "red"
+                )
+            )
+            return
+        params = self._params()
+        for stage in self.stages:
+            self.run_stage(stage, params[stage], getattr(self, stage))
+            if stage == stop_after:
+                break
+
+
+def get_index_version(config: Dict) -> Optional[str]:
+    """
+    Devuelve la versión del índice construido por el pipeline: la clave de su etapa de indexado.
+
+    La clave encadena los hashes de las salidas y los parámetros de todas las etapas
+    anteriores, así que cambia con cualquier cambio en el contenido indexado.
+
+    Args:
+        config (Dict): Configuración de la aplicación cargada de 'config.yaml'.
+
+    Returns:
+        La clave de la etapa 'index', o None si el índice aún no se ha completado.
+    """
+    checkpoint_path = os.path.join(config["pipeline"]["data_dir"], "checkpoint.json")
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as checkpoint_file:
+        index_state = json.load(checkpoint_file).get("index", {})
+    return index_state.get("key") if index_state.get("complete") else None
+
+
+def main():
+    """
+    Ejecuta el pipeline de ingesta de punta a punta desde la línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--force",
+        nargs="+",
+        choices=STAGES,
+        default=[],
+        help="Etapas a volver a ejecutar desde cero aunque sus entradas no hayan cambiado "
+        "(por ejemplo 'crawl' para volver a descargar los repositorios).",
+    )
+    parser.add_argument(
+        "--stop-after",
+        choices=STAGES,
+        default=None,
+        help="Última etapa a ejecutar.",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Ejecuta todas las etapas a la vez conectadas por colas acotadas, "
+        "sin artefactos, deduplicación ni proyección.",
+    )
+    args = parser.parse_args()
+
+    config = load_config()
+    if args.streaming:
+        StreamingPipeline(config).run()
+        Pipeline(config).record_streaming_index()
+        return
+    Pipeline(config, force=args.force).run(stop_after=args.stop_after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.embeddings.base import Embeddings
+from termcolor import colored
+
+PROJECTION_FILE_NAME = "projection.npz"
+
+
+class EmbeddingProjection:
+    """
+    Proyección lineal de embeddings a una dimensión menor: `(x - mean) @ components`.
+
+    Args:
+        components (np.ndarray): Matriz de proyección de forma (dimensión original, dimensión reducida).
+        mean (np.ndarray): Media que se resta antes de proyectar.
+        method (str): Método con el que se ajustó: "pca" o "random".
+    """
+
+    def __init__(self, components: np.ndarray, mean: np.ndarray, method: str = "pca"):
+        self.components = components.astype(np.float32)
+        self.mean = mean.astype(np.float32)
+        self.method = method
+
+    @property
+    def dimension(self) -> int:
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(
+        cls, vectors: np.ndarray, dimension: int, method: str = "pca", seed: int = 0
+    ) -> "EmbeddingProjection":
+        """
+        Ajusta una proyección sobre una muestra de embeddings del corpus.
+
+        Args:
+            vectors (np.ndarray): Muestra de embeddings, de forma (n, dimensión original).
+            dimension (int): Dimensión reducida.
+            method (str): "pca" usa las componentes principales de la muestra; "random" una proyección gaussiana aleatoria.
+            seed (int): Semilla de la proyección aleatoria.
+
+        Returns:
+            La proyección ajustada.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if method == "pca":
+            mean = vectors.mean(axis=0)
+            _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+            return cls(vt[:dimension].T, mean, method)
+        if method == "random":
+            rng = np.random.default_rng(seed)
+            components = rng.standard_normal((vectors.shape[1], dimension))
+            return cls(
+                components / np.sqrt(dimension), np.zeros(vectors.shape[1]), method
+            )
+        raise ValueError(f"Método de proyección no soportado: {method}")
+
+    def truncate(self, dimension: int) -> "EmbeddingProjection":
+        """
+        Devuelve la proyección con solo las primeras `dimension` componentes.
+
+        En PCA las componentes están ordenadas por varianza explicada, así que una
+        proyección ajustada a la dimensión máxima sirve para todas las menores.
+        """
+        return EmbeddingProjection(
+            self.components[:, :dimension], self.mean, self.method
+        )
+
+    def transform(self, vectors) -> np.ndarray:
+        """
+        Proyecta uno o varios embeddings.
+
+        Args:
+            vectors: Embedding o lista de embeddings en la dimensión original.
+
+        Returns:
+            Los embeddings proyectados.
+        """
+        return (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components
+
+    def save(self, file_path: str) -> None:
+        np.savez(
+            file_path,
+            components=self.components,
+            mean=self.mean,
+            method=np.array(self.method),
+        )
+
+    @classmethod
+    def load(cls, file_path: str) -> "EmbeddingProjection":
+        data = np.load(file_path)
+        return cls(data["components"], data["mean"], str(data["method"]))
+
+
+class ProjectedEmbeddings(Embeddings):
+    """
+    Modelo de embeddings que aplica una proyección a los vectores de otro modelo.
+
+    Se usa tanto al indexar documentos como al consultar, para que ambos vivan en
+    el mismo espacio reducido.
+
+    Args:
+        embedding (Embeddings): Modelo de embeddings original.
+        projection (EmbeddingProjection): Proyección a aplicar.
+    """
+
+    def __init__(self, embedding: Embeddings, projection: EmbeddingProjection):
+        self.embedding = embedding
+        self.projection = projection
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.projection.transform(self.embedding.embed_documents(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.projection.transform(self.embedding.embed_query(text)).tolist()
+
+
+def load_projected_embeddings(
+    embedding: Embeddings, persist_directory: str
+) -> Embeddings:
+    """
+    Devuelve el modelo de embeddings a usar con un índice, aplicando su proyección si la tiene.
+
+    Args:
+        embedding (Embeddings): Modelo de embeddings original.
+        persist_directory (str): Directorio del índice de Chroma.
+
+    Returns:
+        Un `ProjectedEmbeddings` si el índice guarda una proyección, o el modelo original si no.
+    """
+    projection_path = os.path.join(persist_directory, PROJECTION_FILE_NAME)
+    if not os.path.exists(projection_path):
+        return embedding
+    return ProjectedEmbeddings(embedding, EmbeddingProjection.load(projection_path))
+
+
+def top_k(documents: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Calcula por fuerza bruta los `k` documentos más cercanos a cada consulta por distancia L2, la métrica por defecto de Chroma.
+
+    Returns:
+        Una matriz (consultas, k) con las posiciones de los documentos más cercanos.
+    """
+    distances = (
+        (queries**2).sum(axis=1)[:, np.newaxis]
+        - 2 * queries @ documents.T
+        + (documents**2).sum(axis=1)[np.newaxis, :]
+    )
+    return np.argpartition(distances, k, axis=1)[:, :k]
+
+
+def recall_at_k(expected: np.ndarray, found: np.ndarray) -> float:
+    """
+    Fracción media de los `k` vecinos de referencia que aparecen entre los `k` encontrados.
+    """
+    k = expected.shape[1]
+    return float(
+        np.mean([len(set(e) & set(f)) / k for e, f in zip(expected, found)])
+    )
+
+
+def select_projection(
+    vectors: np.ndarray,
+    queries: Optional[np.ndarray] = None,
+    target_recall: float = 0.95,
+    k: int = 10,
+    candidates: Sequence[int] = (64, 128, 256, 384, 512),
+    method: str = "pca",
+    num_queries: int = 200,
+    seed: int = 0,
+) -> Tuple[Optional[EmbeddingProjection], Dict]:
+    """
+    Busca la dimensión más pequeña cuya recall@k respecto a la dimensión completa alcanza el objetivo.
+
+    Se comparan los `k` vecinos de cada consulta en la muestra con y sin proyección.
+    Las consultas deben calcularse con `embed_query`, porque Instructor codifica
+    las consultas con otra instrucción que los documentos. Si no se pasan, se apartan
+    `num_queries` vectores de la muestra (como mucho la quinta parte) como consultas.
+    Si no hay al menos una consulta y más de `k` documentos, no se evalúa ninguna
+    dimensión y se mantiene la completa.
+
+    Args:
+        vectors (np.ndarray): Muestra de embeddings de documentos del corpus en la dimensión completa.
+        queries (Optional[np.ndarray]): Embeddings de consultas en la dimensión completa.
+        target_recall (float): Recall@k mínima aceptable.
+        k (int): Número de vecinos evaluados.
+        candidates (Sequence[int]): Dimensiones a probar.
+        method (str): Método de proyección, "pca" o "random".
+        num_queries (int): Número de vectores de la muestra usados como consultas si no se pasa `queries`.
+        seed (int): Semilla para elegir las consultas y para la proyección aleatoria.
+
+    Returns:
+        La proyección elegida (o None si ninguna dimensión alcanza el objetivo o la
+        muestra es demasiado pequeña) y un informe con la recall de cada dimensión probada.
+    """
+    documents = np.asarray(vectors, dtype=np.float32)
+    full_dimension = documents.shape[1]
+    if queries is None:
+        num_queries = min(num_queries, len(documents) // 5)
+        order = np.random.default_rng(seed).permutation(len(documents))
+        queries = documents[order[:num_queries]]
+        documents = documents[order[num_queries:]]
+    queries = np.asarray(queries, dtype=np.float32).reshape(-1, full_dimension)
+    report = {
+        "full_dimension": full_dimension,
+        "k": k,
+        "sample_size": len(documents),
+        "num_queries": len(queries),
+        "recall": {},
+    }
+    if len(queries) < 1 or len(documents) <= k:
+        report["dimension"] = full_dimension
+        print(
+            colored(
+                f"La muestra de {len(documents)} embeddings y {len(queries)} consultas es "
+                f"demasiado pequeña para evaluar recall@{k}; se mantiene la dimensión completa.",
+                "yellow",
+            )
+        )
+        return None, report
+
+    # PCA no puede dar más componentes que vectores tiene la muestra.
+    candidates = sorted(
+        d for d in candidates if d < min(full_dimension, len(documents))
+    )
+    expected = top_k(documents, queries, k)
+
+    if method == "pca" and candidates:
+        full_projection = EmbeddingProjection.fit(documents, candidates[-1], method)
+
+    for dimension in candidates:
+        if method == "pca":
+            projection = full_projection.truncate(dimension)
+        else:
+            projection = EmbeddingProjection.fit(documents, dimension, method, seed)
+        recall = recall_at_k(
+            expected,
+            top_k(projection.transform(documents), projection.transform(queries), k),
+        )
+        report["recall"][dimension] = recall
+        print(colored(f"Dimensión {dimension}: recall@{k} = {recall:.3f}", "cyan"))
+        if recall >= target_recall:
+            report["dimension"] = dimension
+            return projection, report
+
+    report["dimension"] = full_dimension
+    print(
+        colored(
+            f"Ninguna dimensión alcanza recall@{k} >= {target_recall}; se mantiene la dimensión completa.",
+            "yellow",
+        )
+    )
+    return None, report
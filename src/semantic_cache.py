@@ -0,0 +1,234 @@
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+from langchain.chains import RetrievalQAWithSourcesChain
+from langchain.embeddings.base import Embeddings
+from langchain.llms.base import BaseLanguageModel
+from pipeline import get_index_version
+from termcolor import colored
+from utils import load_config
+from vectorstore import get_embeddings, get_vectorstore
+
+
+class SemanticAnswerCache:
+    """
+    Caché semántica de respuestas delante de una cadena de preguntas y respuestas.
+
+    Cada consulta se convierte en embedding y se compara con las consultas ya
+    respondidas; si alguna supera el umbral de similitud coseno se devuelve su
+    respuesta y sus fuentes sin llamar a la cadena (ni al LLM). Las entradas se
+    invalidan cuando cambia la versión del índice.
+
+    Se puede probar sin red usando una cadena construida con un LLM falso, por
+    ejemplo `FakeListLLM` de `langchain.llms.fake`, y `FakeEmbeddings`.
+
+    Args:
+        chain (Callable[[str], Dict]): Cadena a proteger, por ejemplo `qa_chain_with_sources`.
+        embedding: Modelo de embeddings de LangChain con el método `embed_query`.
+        index_version (Union[str, Callable[[], str], None]): Versión del índice o función que la devuelve;
+            la función se evalúa en cada consulta.
+        threshold (float): Similitud coseno mínima para considerar que dos consultas son la misma pregunta.
+        max_entries (int): Número máximo de respuestas guardadas; al superarlo se descartan las más antiguas.
+    """
+
+    def __init__(
+        self,
+        chain: Callable[[str], Dict],
+        embedding,
+        index_version: Union[str, Callable[[], str], None] = None,
+        threshold: float = 0.95,
+        max_entries: int = 10000,
+    ):
+        self.chain = chain
+        self.embedding = embedding
+        self.index_version = index_version
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.latency_saved = 0.0
+        self._version = self._current_version()
+        self._clear()
+
+    def _current_version(self) -> Optional[str]:
+        if callable(self.index_version):
+            return self.index_version()
+        return self.index_version
+
+    def _clear(self) -> None:
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict] = []
+
+    def set_index_version(self, index_version: Optional[str]) -> None:
+        """
+        Cambia la versión del índice; si es distinta de la actual se vacía la caché.
+
+        Args:
+            index_version (Optional[str]): Nueva versión del índice.
+        """
+        self.index_version = index_version
+        self._check_version()
+
+    def _check_version(self) -> None:
+        version = self._current_version()
+        if version != self._version:
+            if self._entries:
+                print(
+                    colored(
+                        f"Índice actualizado ({self._version} -> {version}), se vacía la caché.",
+                        "yellow",
+                    )
+                )
+            self._version = version
+            self._clear()
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _search(self, vector: np.ndarray) -> Optional[int]:
+        if not self._entries:
+            return None
+        scores = self._vectors @ vector
+        best = int(np.argmax(scores))
+        return best if scores[best] >= self.threshold else None
+
+    def lookup(self, query: str) -> Optional[Dict]:
+        """
+        Busca una respuesta guardada para una consulta parecida.
+
+        Args:
+            query (str): Consulta del usuario.
+
+        Returns:
+            La entrada guardada (consulta original, respuesta, latencia y similitud), o None si no hay ninguna sobre el umbral.
+        """
+        self._check_version()
+        vector = self._embed(query)
+        best = self._search(vector)
+        if best is None:
+            return None
+        return dict(
+            self._entries[best], similarity=float(self._vectors[best] @ vector)
+        )
+
+    def __call__(self, query: str) -> Dict:
+        """
+        Responde una consulta desde la caché o, si no hay coincidencia, llamando a la cadena.
+
+        Args:
+            query (str): Consulta del usuario.
+
+        Returns:
+            La salida de la cadena (por ejemplo `question`, `answer` y `sources`) con `question` igual a la consulta recibida.
+        """
+        started = time.perf_counter()
+        self._check_version()
+        vector = self._embed(query)
+        best = self._search(vector)
+        if best is not None:
+            entry = self._entries[best]
+            self.hits += 1
+            self.latency_saved += max(
+                0.0, entry["latency"] - (time.perf_counter() - started)
+            )
+            return dict(entry["response"], question=query)
+
+        response = self.chain(query)
+        self.misses += 1
+        self._entries.append(
+            {
+                "query": query,
+                "response": response,
+                "latency": time.perf_counter() - started,
+            }
+        )
+        if self._vectors is None:
+            self._vectors = vector[np.newaxis, :]
+        else:
+            self._vectors = np.vstack([self._vectors, vector])
+        if len(self._entries) > self.max_entries:
+            self._entries = self._entries[-self.max_entries :]
+            self._vectors = self._vectors[-self.max_entries :]
+        return response
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict:
+        """
+        Devuelve las métricas de la caché.
+
+        Returns:
+            Un diccionario con aciertos, fallos, tasa de aciertos, segundos ahorrados y entradas guardadas.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "latency_saved": self.latency_saved,
+            "entries": len(self._entries),
+            "index_version": self._version,
+        }
+
+
+def get_semantic_cache(
+    chain: Callable[[str], Dict],
+    embedding,
+    index_version: Union[str, Callable[[], str], None] = None,
+) -> SemanticAnswerCache:
+    """
+    Crea una `SemanticAnswerCache` con la configuración de la sección `semantic_cache` de 'config.yaml'.
+
+    Args:
+        chain (Callable[[str], Dict]): Cadena a proteger, por ejemplo `qa_chain_with_sources`.
+        embedding: Modelo de embeddings de LangChain con el método `embed_query`.
+        index_version (Union[str, Callable[[], str], None]): Versión del índice o función que la devuelve.
+
+    Returns:
+        La caché configurada.
+    """
+    cache_config = load_config().get("semantic_cache", {})
+    return SemanticAnswerCache(
+        chain,
+        embedding,
+        index_version=index_version,
+        threshold=cache_config.get("threshold", 0.95),
+        max_entries=cache_config.get("max_entries", 10000),
+    )
+
+
+def build_cached_qa_chain(
+    llm: BaseLanguageModel, embedding: Optional[Embeddings] = None, k: int = 2
+) -> SemanticAnswerCache:
+    """
+    Crea la cadena `RetrievalQAWithSourcesChain` sobre el índice del pipeline con la caché semántica delante.
+
+    La caché usa como versión la clave del índice en el checkpoint del pipeline, así
+    que se vacía sola cuando el índice se reconstruye con otro contenido.
+
+    Args:
+        llm (BaseLanguageModel): Modelo de lenguaje que responde las preguntas.
+        embedding (Optional[Embeddings]): Modelo de embeddings. Si es None se usa el configurado.
+        k (int): Número de fragmentos recuperados por pregunta.
+
+    Returns:
+        La cadena con caché; se llama con la pregunta y devuelve `answer` y `sources`.
+    """
+    config = load_config()
+    embedding = embedding or get_embeddings(config["pipeline"])
+    qa_chain_with_sources = RetrievalQAWithSourcesChain.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=get_vectorstore(config, embedding).as_retriever(
+            search_kwargs={"k": k}
+        ),
+    )
+    return get_semantic_cache(
+        qa_chain_with_sources,
+        embedding,
+        index_version=lambda: get_index_version(config),
+    )
@@ -0,0 +1,359 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain.embeddings import HuggingFaceInstructEmbeddings
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain.vectorstores import Chroma
+from projection import PROJECTION_FILE_NAME
+from termcolor import colored
+from text_extractor import (
+    CrawlPolicy,
+    build_record,
+    clean_text,
+    fetch_file_text,
+    get_github_headers,
+    iter_directory_files,
+)
+from utils import DocsJSONLLoader
+from vectorstore import (
+    add_texts_to_vectorstore,
+    discard_staging_collection,
+    get_embeddings,
+    open_staging_collection,
+    promote_staging_collection,
+)
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """Se lanza en los hilos de una etapa cuando otra etapa ha fallado."""
+
+
+def _get(inbox: queue.Queue, stop: threading.Event):
+    while not stop.is_set():
+        try:
+            return inbox.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    raise _Stopped()
+
+
+def _put(outbox: queue.Queue, item, stop: threading.Event) -> None:
+    while not stop.is_set():
+        try:
+            outbox.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+    raise _Stopped()
+
+
+class StreamingStage:
+    """
+    Etapa del pipeline en streaming: uno o varios hilos que leen de una cola acotada y escriben en la siguiente.
+
+    Las colas acotadas dan la contrapresión: si una etapa se atrasa, las anteriores
+    se bloquean al escribir en lugar de acumular trabajo en memoria.
+
+    Args:
+        name (str): Nombre de la etapa.
+        fn (Callable[[List], Iterable]): Función que recibe una lista de elementos (un lote) y devuelve los elementos de salida.
+        workers (int): Número de hilos de la etapa.
+        batch_size (int): Número máximo de elementos que recibe `fn` en cada llamada.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[List], Iterable],
+        workers: int = 1,
+        batch_size: int = 1,
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.items_in = 0
+        self.items_out = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+        self._active = workers
+
+    def _next_batch(self, inbox: queue.Queue, stop: threading.Event) -> Optional[List]:
+        item = _get(inbox, stop)
+        if item is _DONE:
+            # Se devuelve la marca de fin para que la vean los demás hilos de la etapa.
+            inbox.put(_DONE)
+            return None
+        batch = [item]
+        while len(batch) < self.batch_size:
+            try:
+                item = inbox.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                inbox.put(_DONE)
+                break
+            batch.append(item)
+        return batch
+
+    def work(
+        self,
+        inbox: queue.Queue,
+        outbox: Optional[queue.Queue],
+        stop: threading.Event,
+        errors: List[BaseException],
+    ) -> None:
+        try:
+            while True:
+                batch = self._next_batch(inbox, stop)
+                if batch is None:
+                    break
+                started = time.perf_counter()
+                outputs = list(self.fn(batch))
+                with self._lock:
+                    self.busy_seconds += time.perf_counter() - started
+                    self.items_in += len(batch)
+                    self.items_out += len(outputs)
+                if outbox is not None:
+                    for output in outputs:
+                        _put(outbox, output, stop)
+
+            with self._lock:
+                self._active -= 1
+                last = self._active == 0
+            if last and outbox is not None:
+                _put(outbox, _DONE, stop)
+        except _Stopped:
+            return
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+
+
+def run_streaming_stages(
+    source: Iterable,
+    stages: List[StreamingStage],
+    queue_size: int = 256,
+) -> float:
+    """
+    Conecta las etapas con colas acotadas y las ejecuta en paralelo.
+
+    Args:
+        source (Iterable): Elementos de entrada de la primera etapa; se consumen en un hilo propio.
+        stages (List[StreamingStage]): Etapas en orden.
+        queue_size (int): Capacidad de cada cola entre etapas.
+
+    Returns:
+        El tiempo total en segundos.
+    """
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+
+    def feed() -> None:
+        try:
+            for item in source:
+                _put(queues[0], item, stop)
+            _put(queues[0], _DONE, stop)
+        except _Stopped:
+            return
+        except BaseException as error:
+            errors.append(error)
+            stop.set()
+
+    threads = [threading.Thread(target=feed, name="source", daemon=True)]
+    for position, stage in enumerate(stages):
+        outbox = queues[position + 1] if position + 1 < len(stages) else None
+        for worker in range(stage.workers):
+            threads.append(
+                threading.Thread(
+                    target=stage.work,
+                    args=(queues[position], outbox, stop, errors),
+                    name=f"{stage.name}-{worker}",
+                    daemon=True,
+                )
+            )
+
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        raise
+    if errors:
+        raise errors[0]
+    return time.perf_counter() - started
+
+
+class StreamingPipeline:
+    """
+    Ingesta en streaming: listado, descarga, limpieza, carga, división, embedding e indexado a la vez.
+
+    A diferencia de `Pipeline`, que ejecuta cada etapa completa antes de empezar la
+    siguiente, aquí las etapas se conectan con colas acotadas y cada una corre en sus
+    propios hilos, de modo que la red, la limpieza en CPU y la inferencia del modelo
+    se solapan y el tiempo total se acerca al de la etapa más lenta. La limpieza se
+    reparte en un pool de procesos. No escribe artefactos y no aplica la
+    deduplicación ni la proyección, que necesitan ver el corpus completo.
+
+    El índice se construye en una colección temporal que solo sustituye a la
+    colección configurada si la ingesta termina sin errores.
+
+    Args:
+        config (Dict): Configuración de la aplicación cargada de 'config.yaml'.
+    """
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.settings = config["pipeline"]
+        self.policy = CrawlPolicy.from_config(config["github"])
+
+    def _list_files(self) -> Iterable:
+        headers = get_github_headers()
+        for repo_info in self.config["github"]["repos"]:
+            for file in iter_directory_files(
+                repo_info["path"], repo_info, headers, self.policy
+            ):
+                yield file, repo_info
+
+    def _download(self, batch: List) -> Iterable:
+        for file, repo_info in batch:
+            text = fetch_file_text(file["download_url"])
+            if text is None or not isinstance(text, str):
+                print(f"Texto no esperado: {text}")
+                continue
+            yield file, repo_info, text
+
+    def _clean(self, executor: ProcessPoolExecutor) -> Callable[[List], Iterable]:
+        def clean(batch: List) -> Iterable:
+            texts = executor.map(clean_text, [text for _, _, text in batch])
+            for (file, repo_info, _), text in zip(batch, texts):
+                record = build_record(file["name"], repo_info, text)
+                yield file["download_url"], record
+
+        return clean
+
+    def _load(self, batch: List) -> Iterable:
+        for url, record in batch:
+            yield url, record.get("text", ""), DocsJSONLLoader.record_metadata(record)
+
+    def _split(self, text_splitter: RecursiveCharacterTextSplitter):
+        def split(batch: List) -> Iterable:
+            for url, text, metadata in batch:
+                url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+                for chunk_index, chunk in enumerate(text_splitter.split_text(text)):
+                    yield f"{url_hash}-{chunk_index}", chunk, metadata
+
+        return split
+
+    def _embed(self, embedding: HuggingFaceInstructEmbeddings):
+        def embed(batch: List) -> Iterable:
+            vectors = embedding.embed_documents([chunk for _, chunk, _ in batch])
+            return [(item, vector) for item, vector in zip(batch, vectors)]
+
+        return embed
+
+    def _index(self, vectorstore: Chroma):
+        def index(batch: List) -> Iterable:
+            add_texts_to_vectorstore(
+                vectorstore,
+                [chunk for (_, chunk, _), _ in batch],
+                [metadata for (_, _, metadata), _ in batch],
+                ids=[chunk_id for (chunk_id, _, _), _ in batch],
+                embeddings=[vector for _, vector in batch],
+            )
+            return []
+
+        return index
+
+    def run(self) -> None:
+        """
+        Ejecuta la ingesta completa y muestra el tiempo ocupado de cada etapa frente al total.
+        """
+        # Se descarta la colección temporal que haya dejado una ejecución interrumpida.
+        vectorstore = open_staging_collection(self.settings, "streaming")
+
+        embedding = get_embeddings(self.settings)
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.settings["chunk_size"],
+            chunk_overlap=self.settings["chunk_overlap"],
+            length_function=len,
+        )
+
+        clean_processes = self.settings["streaming_clean_processes"]
+        with ProcessPoolExecutor(max_workers=clean_processes) as executor:
+            stages = [
+                StreamingStage(
+                    "download",
+                    self._download,
+                    workers=self.settings["streaming_download_workers"],
+                ),
+                StreamingStage(
+                    "clean",
+                    self._clean(executor),
+                    workers=clean_processes,
+                    batch_size=8,
+                ),
+                StreamingStage("load", self._load),
+                StreamingStage(
+                    "split",
+                    self._split(text_splitter),
+                    workers=self.settings["streaming_split_workers"],
+                ),
+                StreamingStage(
+                    "embed",
+                    self._embed(embedding),
+                    batch_size=self.settings["embedding_batch_size"],
+                ),
+                StreamingStage(
+                    "index",
+                    self._index(vectorstore),
+                    batch_size=self.settings["index_batch_size"],
+                ),
+            ]
+            try:
+                elapsed = run_streaming_stages(
+                    self._list_files(),
+                    stages,
+                    queue_size=self.settings["streaming_queue_size"],
+                )
+            except BaseException:
+                discard_staging_collection(vectorstore)
+                raise
+
+        promote_staging_collection(vectorstore, self.settings)
+        # El índice se ha reconstruido con los embeddings completos: una proyección anterior ya no aplica.
+        index_projection = os.path.join(
+            self.settings["chroma_persist_directory"], PROJECTION_FILE_NAME
+        )
+        if os.path.exists(index_projection):
+            os.remove(index_projection)
+
+        self.policy.print_report()
+        for stage in stages:
+            print(
+                colored(
+                    f"Etapa '{stage.name}': {stage.items_in} -> {stage.items_out} elementos, "
+                    f"{stage.busy_seconds / stage.workers:.1f} s ocupada por hilo "
+                    f"({stage.workers} hilos).",
+                    "cyan",
+                )
+            )
+        sequential = sum(stage.busy_seconds / stage.workers for stage in stages)
+        print(
+            colored(
+                f"Tiempo total: {elapsed:.1f} s (suma de etapas: {sequential:.1f} s).",
+                "green",
+            )
+        )
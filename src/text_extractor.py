@@ -1,8 +1,9 @@
 import datetime
+import fnmatch
 import json
 import os
 import re
-from typing import Dict
+from typing import Dict, Iterator, List, Optional
 
 import emoji
 import requests
@@ -29,6 +30,55 @@ def preprocess_text(text: str) -> str:
     return text
 
 
+def clean_text(text: str) -> str:
+    """
+    Limpia el texto descargado de un archivo: lo preprocesa y normaliza los espacios.
+
+    Args:
+        text (str): Texto a limpiar.
+
+    Returns:
+        El texto limpio.
+    """
+    text = preprocess_text(text)
+    text = re.sub(r"\s+", " ", text)
+    return text.strip()
+
+
+def build_record(filename: str, repo_info: dict, text: str) -> dict:
+    """
+    Construye el registro JSONL de un archivo descargado.
+
+    Args:
+        filename (str): Nombre del archivo.
+        repo_info (dict): Información sobre el repositorio del archivo.
+        text (str): Texto limpio del archivo.
+
+    Returns:
+        Un diccionario con el título, el repositorio y el texto del archivo.
+    """
+    return {
+        "title": filename,
+        "repo_owner": repo_info["owner"],
+        "repo_name": repo_info["repo"],
+        "text": text,
+    }
+
+
+def fetch_file_text(url: str) -> str:
+    """
+    Descarga el contenido de un archivo como texto.
+
+    Args:
+        url (str): URL desde donde se descarga el archivo.
+
+    Returns:
+        El texto del archivo.
+    """
+    response = requests.get(url)
+    return response.text
+
+
 def download_file(url: str, repo_info: dict, jsonl_file_name: str) -> None:
     """
     Descarga un archivo desde una URL y lo guarda en un archivo JSONL.
@@ -38,21 +88,11 @@ def download_file(url: str, repo_info: dict, jsonl_file_name: str) -> None:
         repo_info (dict): Información sobre el repositorio desde donde se descarga el archivo.
         jsonl_file_name (str): Nombre del archivo JSONL donde se guarda el archivo descargado.
     """
-    response = requests.get(url)
     filename = url.split("/")[-1]
-    text = response.text
+    text = fetch_file_text(url)
 
     if text is not None and isinstance(text, str):
-        text = preprocess_text(text)
-        text = re.sub(r"\s+", " ", text)
-        text = text.strip()
-
-        file_dict = {
-            "title": filename,
-            "repo_owner": repo_info["owner"],
-            "repo_name": repo_info["repo"],
-            "text": text,
-        }
+        file_dict = build_record(filename, repo_info, clean_text(text))
 
         with open(jsonl_file_name, "a") as jsonl_file:
             jsonl_file.write(json.dumps(file_dict) + "\n")
@@ -60,29 +100,170 @@ def download_file(url: str, repo_info: dict, jsonl_file_name: str) -> None:
         print(f"Texto no esperado: {text}")
 
 
-def process_directory(
+class CrawlPolicy:
+    """
+    Reglas para decidir qué descargar del listado de la API de GitHub antes de pedir cada archivo.
+
+    Las reglas se evalúan sobre los campos `path` y `size` del listado, de modo que
+    los archivos descartados nunca se descargan. Los patrones usan la sintaxis de
+    `fnmatch` sobre la ruta completa dentro del repositorio (`*` también cruza `/`).
+    Las exclusiones se comparan también con la ruta precedida de `/` y, para los
+    directorios, terminada en `/`, de modo que `*/vendor/*` omite tanto `vendor/a.md`
+    como el directorio `docs/vendor` sin llegar a listarlo.
+
+    Args:
+        include (Optional[List[str]]): Patrones de archivos a descargar.
+        exclude (Optional[List[str]]): Patrones de archivos o directorios a omitir.
+        language_dirs (Optional[List[str]]): Nombres de directorios de traducciones a omitir, por ejemplo 'zh'.
+        max_file_size (Optional[int]): Tamaño máximo en bytes de un archivo. Si es None no hay límite.
+        byte_budget (Optional[int]): Bytes máximos a descargar en toda la ejecución. Si es None no hay límite.
+    """
+
+    def __init__(
+        self,
+        include: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        language_dirs: Optional[List[str]] = None,
+        max_file_size: Optional[int] = None,
+        byte_budget: Optional[int] = None,
+    ):
+        self.include = include if include is not None else ["*.md", "*.mdx"]
+        self.exclude = exclude or []
+        self.language_dirs = set(language_dirs if language_dirs is not None else ["zh"])
+        self.max_file_size = max_file_size
+        self.byte_budget = byte_budget
+        self.downloaded_files = 0
+        self.downloaded_bytes = 0
+        self.skipped: Dict[str, Dict[str, int]] = {}
+
+    @classmethod
+    def from_config(cls, github_config: Dict) -> "CrawlPolicy":
+        """
+        Crea la política a partir de la sección `github` de 'config.yaml'.
+
+        Args:
+            github_config (Dict): Sección `github` de la configuración.
+
+        Returns:
+            La política de descarga configurada.
+        """
+        filters = github_config.get("filters", {})
+        return cls(
+            include=filters.get("include"),
+            exclude=filters.get("exclude"),
+            language_dirs=filters.get("language_dirs"),
+            max_file_size=filters.get("max_file_size"),
+            byte_budget=github_config.get("byte_budget"),
+        )
+
+    def _skip(self, reason: str, path: str, size: int = 0) -> str:
+        stats = self.skipped.setdefault(reason, {"count": 0, "bytes": 0})
+        stats["count"] += 1
+        stats["bytes"] += size
+        print(colored(f"Se omite ({reason}): {path}", "yellow"))
+        return reason
+
+    def _excluded(self, path: str, is_directory: bool = False) -> bool:
+        candidates = [path, "/" + path]
+        if is_directory:
+            candidates += [path + "/", "/" + path + "/"]
+        return any(
+            fnmatch.fnmatch(candidate, pattern)
+            for pattern in self.exclude
+            for candidate in candidates
+        )
+
+    def _budget_exhausted(self) -> bool:
+        return self.byte_budget is not None and self.downloaded_bytes >= self.byte_budget
+
+    def check_directory(self, path: str) -> Optional[str]:
+        """
+        Decide si se recorre un directorio.
+
+        Args:
+            path (str): Ruta del directorio dentro del repositorio.
+
+        Returns:
+            El motivo por el que se omite, o None si se debe recorrer.
+        """
+        if os.path.basename(path) in self.language_dirs:
+            return self._skip("idioma", path)
+        if self._excluded(path, is_directory=True):
+            return self._skip("excluido", path)
+        if self._budget_exhausted():
+            return self._skip("presupuesto", path)
+        return None
+
+    def check_file(self, path: str, size: int) -> Optional[str]:
+        """
+        Decide si se descarga un archivo y, en ese caso, descuenta su tamaño del presupuesto.
+
+        Args:
+            path (str): Ruta del archivo dentro del repositorio.
+            size (int): Tamaño en bytes indicado en el listado.
+
+        Returns:
+            El motivo por el que se omite, o None si se debe descargar.
+        """
+        if not any(fnmatch.fnmatch(path, pattern) for pattern in self.include):
+            return "formato"
+        if self._excluded(path):
+            return self._skip("excluido", path, size)
+        if self.max_file_size is not None and size > self.max_file_size:
+            return self._skip("tamaño", path, size)
+        if (
+            self.byte_budget is not None
+            and self.downloaded_bytes + size > self.byte_budget
+        ):
+            return self._skip("presupuesto", path, size)
+        self.downloaded_files += 1
+        self.downloaded_bytes += size
+        return None
+
+    def print_report(self) -> None:
+        """
+        Muestra lo descargado, lo omitido por cada regla y el ancho de banda ahorrado.
+        """
+        print(
+            colored(
+                f"Descargados {self.downloaded_files} archivos ({self.downloaded_bytes / 2**20:.1f} MB).",
+                "green",
+            )
+        )
+        saved = 0
+        for reason, stats in self.skipped.items():
+            saved += stats["bytes"]
+            print(
+                colored(
+                    f"Omitidos por {reason}: {stats['count']} ({stats['bytes'] / 2**20:.1f} MB)",
+                    "yellow",
+                )
+            )
+        print(colored(f"Ancho de banda ahorrado: {saved / 2**20:.1f} MB.", "green"))
+
+
+def iter_directory_files(
     path: str,
     repo_info: Dict,
     headers: Dict,
-    jsonl_file_name: str,
-) -> None:
+    policy: Optional[CrawlPolicy] = None,
+) -> Iterator[Dict]:
     """
-    Procesa un directorio de un repositorio de GitHub y descarga los archivos en él.
+    Recorre un directorio de un repositorio de GitHub y devuelve los archivos a descargar.
 
     Args:
         path (str): Ruta del directorio a procesar.
         repo_info (Dict): Información sobre el repositorio que contiene el directorio.
         headers (Dict): Headers para la petición a la API de GitHub.
-        jsonl_file_name (str): Nombre del archivo JSONL donde se guardarán los archivos descargados.
+        policy (Optional[CrawlPolicy]): Reglas de filtrado. Si es None solo se descargan archivos
+            Markdown y se omiten las traducciones en chino.
+
+    Returns:
+        Un iterador con las entradas del listado de la API de GitHub de cada archivo a descargar.
     """
-    # Si el nombre del directorio es 'zh', lo omite y retorna inmediatamente.
-    # Esta característica está implementada para no descargar las traducciones en chino.
-    if os.path.basename(path) == "zh":
-        print(
-            colored(
-                f"Se omite el directorio 'zh' (traducciones en chino): {path}", "yellow"
-            )
-        )
+    policy = policy or CrawlPolicy()
+    # Los directorios descartados no se listan, lo que también ahorra peticiones a la API.
+    if policy.check_directory(path) is not None:
         return
 
     base_url = f"https://api.github.com/repos/{repo_info['owner']}/{repo_info['repo']}/contents/"
@@ -94,22 +275,15 @@ def process_directory(
     if response.status_code == 200:
         files = response.json()
         for file in files:
-            if file["type"] == "file" and (
-                file["name"].endswith(".mdx") or file["name"].endswith(".md")
-            ):
-                print(colored(f"Descargando documento: {file['name']}", "green"))
-                print(colored(f"Descarga URL: {file['download_url']}", "cyan"))
-                download_file(
-                    file["download_url"],
-                    repo_info,
-                    jsonl_file_name,
-                )
+            if file["type"] == "file":
+                if policy.check_file(file["path"], file.get("size", 0)) is None:
+                    yield file
             elif file["type"] == "dir":
-                process_directory(
+                yield from iter_directory_files(
                     file["path"],
                     repo_info,
                     headers,
-                    jsonl_file_name,
+                    policy,
                 )
         print(colored("Exito en extracción de documentos del directorio.", "green"))
     else:
@@ -121,11 +295,40 @@ def process_directory(
         )
 
 
-def main():
+def process_directory(
+    path: str,
+    repo_info: Dict,
+    headers: Dict,
+    jsonl_file_name: str,
+    policy: Optional[CrawlPolicy] = None,
+) -> None:
     """
-    Función principal que se ejecuta cuando se inicia el script.
+    Procesa un directorio de un repositorio de GitHub y descarga los archivos en él.
+
+    Args:
+        path (str): Ruta del directorio a procesar.
+        repo_info (Dict): Información sobre el repositorio que contiene el directorio.
+        headers (Dict): Headers para la petición a la API de GitHub.
+        jsonl_file_name (str): Nombre del archivo JSONL donde se guardarán los archivos descargados.
+        policy (Optional[CrawlPolicy]): Reglas de filtrado de los archivos a descargar.
+    """
+    for file in iter_directory_files(path, repo_info, headers, policy):
+        print(colored(f"Descargando documento: {file['name']}", "green"))
+        print(colored(f"Descarga URL: {file['download_url']}", "cyan"))
+        download_file(
+            file["download_url"],
+            repo_info,
+            jsonl_file_name,
+        )
+
+
+def get_github_headers() -> Dict:
+    """
+    Construye los headers para la API de GitHub a partir de la variable de entorno GITHUB_TOKEN.
+
+    Returns:
+        Un diccionario con los headers de autenticación.
     """
-    config = load_config()
     github_token = os.getenv("GITHUB_TOKEN")
 
     if github_token is None:
@@ -133,11 +336,20 @@ def main():
             "GITHUB_TOKEN no está configurado en las variables de entorno."
         )
 
-    headers = {
+    return {
         "Authorization": f"Bearer {github_token}",
         "Accept": "application/vnd.github.v3.raw",
     }
 
+
+def main():
+    """
+    Función principal que se ejecuta cuando se inicia el script.
+    """
+    config = load_config()
+    headers = get_github_headers()
+    policy = CrawlPolicy.from_config(config["github"])
+
     current_date = datetime.date.today().strftime("%Y_%m_%d")
     jsonl_file_name = f"data/docs_en_{current_date}.jsonl"
 
@@ -150,8 +362,11 @@ def main():
             repo_info,
             headers,
             jsonl_file_name,
+            policy,
         )
 
+    policy.print_report()
+
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,15 @@
+import datetime
+import hashlib
+import json
 import os
+import re
 import sys
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import jsonlines
 import yaml
+from document_batch import DocumentBatch
 from langchain.schema import Document
 
 
@@ -17,6 +24,23 @@ class DocsJSONLLoader:
     def __init__(self, file_path: str):
         self.file_path = file_path
 
+    @staticmethod
+    def record_metadata(obj: Dict) -> Dict:
+        """
+        Extrae los metadatos de un registro del archivo JSONL.
+
+        Args:
+            obj (Dict): Registro con las claves `title`, `repo_owner` y `repo_name`.
+
+        Returns:
+            Un diccionario con los metadatos del documento.
+        """
+        return {
+            "title": obj.get("title", ""),
+            "repo_owner": obj.get("repo_owner", ""),
+            "repo_name": obj.get("repo_name", ""),
+        }
+
     def load(self):
         """
         Carga los documentos de la ruta del archivo especificada durante la inicialización.
@@ -28,14 +52,298 @@ class DocsJSONLLoader:
             documents = []
             for obj in reader:
                 page_content = obj.get("text", "")
-                metadata = {
-                    "title": obj.get("title", ""),
-                    "repo_owner": obj.get("repo_owner", ""),
-                    "repo_name": obj.get("repo_name", ""),
-                }
+                metadata = self.record_metadata(obj)
                 documents.append(Document(page_content=page_content, metadata=metadata))
         return documents
 
+    def load_batch(self) -> DocumentBatch:
+        """
+        Carga los documentos en un `DocumentBatch` columnar, sin crear un Document por registro.
+
+        Returns:
+            Un DocumentBatch con los textos y metadatos de los registros.
+        """
+        batch = DocumentBatch()
+        with jsonlines.open(self.file_path) as reader:
+            for obj in reader:
+                batch.append(obj.get("text", ""), self.record_metadata(obj))
+        return batch
+
+
+class _JSONStream:
+    """
+    Lector incremental de JSON que mantiene en memoria solo un bloque del archivo.
+
+    Permite recorrer la estructura carácter a carácter y decodificar valores
+    pequeños con `json.JSONDecoder.raw_decode` sin cargar el archivo completo.
+    """
+
+    WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+    def __init__(self, file, chunk_size: int = 1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> None:
+        if self.pos > self.chunk_size:
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        data = self.file.read(self.chunk_size)
+        if not data:
+            self.eof = True
+        self.buffer += data
+
+    def peek(self) -> str:
+        while True:
+            self.pos = self.WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos : self.pos + 1]
+            self._fill()
+
+    def consume(self, expected: str) -> None:
+        if self.peek() != expected:
+            raise ValueError(
+                f"JSON no válido: se esperaba '{expected}' y se encontró '{self.peek()}'"
+            )
+        self.pos += 1
+
+    def read_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # Un número al final del bloque puede estar cortado: se lee más y se reintenta.
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+class TelegramChatLoader:
+    """
+    Cargador de exportaciones JSON de Telegram Desktop (`result.json`) en ventanas de conversación.
+
+    El archivo se recorre de forma incremental, por lo que la memoria usada no depende
+    del tamaño de la exportación. Acepta tanto la exportación de un solo chat como la
+    exportación completa de la cuenta (`chats.list`).
+
+    Args:
+        file_path (str): Ruta al archivo JSON exportado.
+        window (str): Estrategia de agrupación: "time" agrupa mensajes consecutivos separados
+            por menos de `max_gap_minutes`; "reply" agrupa cada respuesta con el hilo del mensaje al que responde
+            y los demás mensajes con el hilo activo más reciente del chat, de modo que solo se abre un hilo
+            nuevo con una respuesta a un mensaje desconocido o tras `max_gap_minutes` sin actividad.
+        max_gap_minutes (int): Minutos de inactividad a partir de los cuales se cierra una ventana.
+        max_messages (int): Número máximo de mensajes por ventana.
+        max_tracked_messages (int): Número máximo de mensajes recordados para resolver respuestas en el modo "reply".
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        window: str = "time",
+        max_gap_minutes: int = 30,
+        max_messages: int = 50,
+        max_tracked_messages: int = 10000,
+    ):
+        if window not in ("time", "reply"):
+            raise ValueError(f"Ventana no soportada: {window}. Usa 'time' o 'reply'.")
+        self.file_path = file_path
+        self.window = window
+        self.max_gap = max_gap_minutes * 60
+        self.max_messages = max_messages
+        self.max_tracked_messages = max_tracked_messages
+
+    def _walk_object(
+        self, stream: _JSONStream, context: Dict
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        stream.consume("{")
+        context = dict(context)
+        while True:
+            char = stream.peek()
+            if char == "}":
+                stream.consume("}")
+                return
+            if char == ",":
+                stream.consume(",")
+                continue
+            key = stream.read_value()
+            stream.consume(":")
+            char = stream.peek()
+            if key == "messages" and char == "[":
+                stream.consume("[")
+                while True:
+                    char = stream.peek()
+                    if char == "]":
+                        stream.consume("]")
+                        break
+                    if char == ",":
+                        stream.consume(",")
+                        continue
+                    yield context, stream.read_value()
+            elif char == "{":
+                yield from self._walk_object(stream, context)
+            elif char == "[":
+                yield from self._walk_array(stream, context)
+            else:
+                value = stream.read_value()
+                if key in ("name", "type", "id"):
+                    context[key] = value
+
+    def _walk_array(
+        self, stream: _JSONStream, context: Dict
+    ) -> Iterator[Tuple[Dict, Dict]]:
+        stream.consume("[")
+        while True:
+            char = stream.peek()
+            if char == "]":
+                stream.consume("]")
+                return
+            if char == ",":
+                stream.consume(",")
+            elif char == "{":
+                yield from self._walk_object(stream, context)
+            elif char == "[":
+                yield from self._walk_array(stream, context)
+            else:
+                stream.read_value()
+
+    def _iter_messages(self) -> Iterator[Dict]:
+        """
+        Recorre la exportación y devuelve los mensajes de texto con los datos de su chat.
+        """
+        with open(self.file_path, encoding="utf-8") as file:
+            stream = _JSONStream(file)
+            for chat, message in self._walk_object(stream, {}):
+                if message.get("type") != "message":
+                    continue
+                text = message.get("text", "")
+                if isinstance(text, list):
+                    text = "".join(
+                        part if isinstance(part, str) else part.get("text", "")
+                        for part in text
+                    )
+                if not text.strip():
+                    continue
+                if "date_unixtime" in message:
+                    timestamp = int(message["date_unixtime"])
+                else:
+                    timestamp = datetime.datetime.fromisoformat(
+                        message["date"]
+                    ).timestamp()
+                yield {
+                    "id": message.get("id"),
+                    "reply_to": message.get("reply_to_message_id"),
+                    "sender": message.get("from") or message.get("from_id") or "",
+                    "date": message.get("date", ""),
+                    "timestamp": timestamp,
+                    "text": text,
+                    "chat_name": chat.get("name") or "",
+                    "chat_id": chat.get("id", ""),
+                    "chat_type": chat.get("type", ""),
+                }
+
+    def _to_document(self, messages: List[Dict]) -> Document:
+        first, last = messages[0], messages[-1]
+        page_content = "\n".join(
+            f"[{message['date']}] {message['sender']}: {message['text']}"
+            for message in messages
+        )
+        metadata = {
+            "source": self.file_path,
+            "chat_name": first["chat_name"],
+            "chat_id": first["chat_id"],
+            "chat_type": first["chat_type"],
+            "senders": ", ".join(sorted({str(message["sender"]) for message in messages})),
+            "date_start": first["date"],
+            "date_end": last["date"],
+            "message_id_start": first["id"],
+            "message_id_end": last["id"],
+            "message_count": len(messages),
+        }
+        return Document(page_content=page_content, metadata=metadata)
+
+    def _time_windows(self) -> Iterator[List[Dict]]:
+        window = []
+        for message in self._iter_messages():
+            if window and (
+                message["chat_id"] != window[-1]["chat_id"]
+                or message["timestamp"] - window[-1]["timestamp"] > self.max_gap
+                or len(window) >= self.max_messages
+            ):
+                yield window
+                window = []
+            window.append(message)
+        if window:
+            yield window
+
+    def _reply_windows(self) -> Iterator[List[Dict]]:
+        # Hilos abiertos ordenados por actividad: el primero es el más antiguo.
+        threads: "OrderedDict[object, List[Dict]]" = OrderedDict()
+        roots: "OrderedDict[object, object]" = OrderedDict()
+        chat_id: Optional[object] = None
+        for message in self._iter_messages():
+            if message["chat_id"] != chat_id:
+                yield from threads.values()
+                threads.clear()
+                roots.clear()
+                chat_id = message["chat_id"]
+
+            while threads:
+                oldest = next(iter(threads.values()))
+                if message["timestamp"] - oldest[-1]["timestamp"] <= self.max_gap:
+                    break
+                yield threads.popitem(last=False)[1]
+
+            if message["reply_to"] is not None:
+                root = roots.get(message["reply_to"], message["id"])
+            elif threads:
+                # Un mensaje que no responde a otro continúa el hilo activo más reciente.
+                root = next(reversed(threads))
+            else:
+                root = message["id"]
+            roots[message["id"]] = root
+            if len(roots) > self.max_tracked_messages:
+                roots.popitem(last=False)
+
+            thread = threads.pop(root, [])
+            thread.append(message)
+            if len(thread) >= self.max_messages:
+                yield thread
+            else:
+                threads[root] = thread
+        yield from threads.values()
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Carga la exportación como un flujo de documentos, uno por ventana de conversación.
+
+        Returns:
+            Un iterador de objetos Document con metadatos de chat, remitentes y fechas.
+        """
+        windows = self._time_windows() if self.window == "time" else self._reply_windows()
+        for messages in windows:
+            yield self._to_document(messages)
+
+    def load(self) -> List[Document]:
+        """
+        Carga todas las ventanas de conversación de la exportación.
+
+        Returns:
+            Una lista de objetos Document.
+        """
+        return list(self.lazy_load())
+
 
 def load_config():
     """
@@ -129,3 +437,21 @@ def remove_existing_file(file_path: str) -> None:
     """
     if os.path.exists(file_path):
         os.remove(file_path)
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyéndolo por bloques.
+
+    Args:
+        file_path (str): Ruta del archivo.
+        chunk_size (int): Tamaño en bytes de cada bloque leído.
+
+    Returns:
+        El hash hexadecimal del contenido del archivo.
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
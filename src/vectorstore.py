@@ -0,0 +1,131 @@
+from typing import Dict, List, Optional
+
+from langchain.embeddings import HuggingFaceInstructEmbeddings
+from langchain.embeddings.base import Embeddings
+from langchain.vectorstores import Chroma
+from projection import load_projected_embeddings
+
+
+def get_embeddings(settings: Dict) -> HuggingFaceInstructEmbeddings:
+    """
+    Crea el modelo de embeddings configurado para el índice.
+
+    Args:
+        settings (Dict): Sección `pipeline` de 'config.yaml'.
+
+    Returns:
+        El modelo de embeddings de Instructor.
+    """
+    return HuggingFaceInstructEmbeddings(
+        model_name=settings["embedding_model"],
+        model_kwargs={"device": settings["embedding_device"]},
+    )
+
+
+def get_vectorstore(config: Dict, embedding: Optional[Embeddings] = None) -> Chroma:
+    """
+    Abre el índice construido por el pipeline para consultarlo.
+
+    Si el índice se construyó con proyección, las consultas se proyectan a la misma
+    dimensión que los documentos; por eso el índice se debe abrir siempre con esta
+    función y no con `Chroma` directamente.
+
+    Args:
+        config (Dict): Configuración de la aplicación cargada de 'config.yaml'.
+        embedding (Optional[Embeddings]): Modelo de embeddings. Si es None se usa el configurado.
+
+    Returns:
+        El vectorstore de la colección configurada.
+    """
+    settings = config["pipeline"]
+    persist_directory = settings["chroma_persist_directory"]
+    return Chroma(
+        collection_name=settings["chroma_collection"],
+        persist_directory=persist_directory,
+        embedding_function=load_projected_embeddings(
+            embedding or get_embeddings(settings), persist_directory
+        ),
+    )
+
+
+def open_staging_collection(
+    settings: Dict, suffix: str, resume: bool = False
+) -> Chroma:
+    """
+    Abre la colección temporal de Chroma en la que se construye un índice nuevo.
+
+    Las consultas siguen usando la colección configurada hasta que la temporal se
+    publica con `promote_staging_collection`, así que un fallo a mitad de la
+    indexación nunca deja un índice parcial a la vista.
+
+    Args:
+        settings (Dict): Sección `pipeline` de 'config.yaml'.
+        suffix (str): Sufijo que se añade al nombre de la colección configurada.
+        resume (bool): Si es True se conserva lo que ya contenga la colección temporal;
+            si es False se vacía antes de empezar.
+
+    Returns:
+        El vectorstore de la colección temporal.
+    """
+    name = f"{settings['chroma_collection']}-{suffix}"
+    persist_directory = settings["chroma_persist_directory"]
+    if not resume:
+        Chroma(
+            collection_name=name, persist_directory=persist_directory
+        ).delete_collection()
+    return Chroma(collection_name=name, persist_directory=persist_directory)
+
+
+def promote_staging_collection(staging: Chroma, settings: Dict) -> None:
+    """
+    Sustituye la colección configurada por la colección temporal ya completa.
+
+    Args:
+        staging (Chroma): Vectorstore devuelto por `open_staging_collection`.
+        settings (Dict): Sección `pipeline` de 'config.yaml'.
+    """
+    Chroma(
+        collection_name=settings["chroma_collection"],
+        persist_directory=settings["chroma_persist_directory"],
+    ).delete_collection()
+    staging._collection.modify(name=settings["chroma_collection"])
+    staging.persist()
+
+
+def discard_staging_collection(staging: Chroma) -> None:
+    """
+    Elimina una colección temporal sin tocar la colección configurada.
+
+    Args:
+        staging (Chroma): Vectorstore devuelto por `open_staging_collection`.
+    """
+    staging.delete_collection()
+    staging.persist()
+
+
+def add_texts_to_vectorstore(
+    vectorstore,
+    texts: List[str],
+    metadatas: List[Dict],
+    ids: Optional[List[str]] = None,
+    embeddings: Optional[List[List[float]]] = None,
+) -> None:
+    """
+    Añade textos a un vectorstore de Chroma sin crear objetos Document.
+
+    Args:
+        vectorstore: Vectorstore de Chroma de LangChain.
+        texts (List[str]): Textos a indexar.
+        metadatas (List[Dict]): Metadatos de cada texto.
+        ids (Optional[List[str]]): Identificadores de los documentos.
+        embeddings (Optional[List[List[float]]]): Embeddings ya calculados. Si es None los calcula el vectorstore.
+    """
+    if embeddings is None:
+        vectorstore.add_texts(texts, metadatas, ids=ids)
+        return
+    vectorstore._collection.upsert(
+        ids=ids,
+        embeddings=embeddings,
+        metadatas=metadatas,
+        documents=texts,
+    )